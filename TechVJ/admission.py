@@ -0,0 +1,140 @@
+import time
+from config import (
+    ADMIN_ID, ADMINS, OWNER_ID, HEAVY_PER_MINUTE, HEAVY_BURST, LIGHT_PER_MINUTE, LIGHT_BURST,
+    PREMIUM_RATE_MULTIPLIER, FREE_HEAVY_PER_MINUTE
+)
+
+HEAVY = "heavy"
+LIGHT = "light"
+
+# Commands and buttons that start a download, an upload or a login flow.
+# Links and /generate only answer with a menu, the button pressed next is what costs.
+HEAVY_COMMANDS = {"leech", "audio", "convert"}
+HEAVY_CALLBACKS = {"dl:video", "dl:audio", "pyrogram", "pyrogram_bot", "telethon", "telethon_bot"}
+
+# Commands the bot answers. Outside private chats only these are rate limited,
+# other group chatter never reaches a handler and costs no token.
+# Keep in sync with the filters.command() of the handlers under plugins/.
+COMMANDS = [
+    "start", "convert", "audio", "leech", "delete_user", "broadcast", "add_premium",
+    "remove_premium", "premium_list", "stats", "export_users", "lag", "lag_reset", "cookies",
+    "limits"
+]
+
+# Seconds between sweeps, each one drops the buckets that have refilled to full
+SWEEP_INTERVAL = 60
+
+
+def command_of(text):
+    if not text or not text.startswith("/"):
+        return None
+    return text.split(None, 1)[0][1:].split("@", 1)[0].lower()
+
+
+def classify_message(message):
+    return HEAVY if command_of(message.text or message.caption) in HEAVY_COMMANDS else LIGHT
+
+
+def classify_callback(callback_query):
+    return HEAVY if callback_query.data in HEAVY_CALLBACKS else LIGHT
+
+
+class AdmissionControl:
+    """Token buckets per user and class, checked before any handler runs.
+
+    A bucket is a two item list [tokens, last refill] in a dict keyed by
+    (user_id, class), so an idle user costs one small entry until the
+    sweep drops it. Premium users refill faster and don't draw from the
+    bucket all free users share for heavy work. Admins are never limited.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.notified = {}
+        self.premium = set()
+        self.exempt = {ADMIN_ID, ADMINS, OWNER_ID}
+        self.free_heavy = [FREE_HEAVY_PER_MINUTE, time.monotonic()]
+        self.rejected = {HEAVY: 0, LIGHT: 0}
+        self._last_sweep = time.monotonic()
+
+    def load_premium(self, user_ids):
+        self.premium = set(user_ids)
+
+    def set_premium(self, user_id, premium):
+        if premium:
+            self.premium.add(user_id)
+        else:
+            self.premium.discard(user_id)
+        # The bucket is rebuilt with the new tier on the next request
+        self.buckets.pop((user_id, HEAVY), None)
+        self.buckets.pop((user_id, LIGHT), None)
+
+    def limits(self, user_id, cls):
+        rate, burst = (HEAVY_PER_MINUTE, HEAVY_BURST) if cls == HEAVY else (LIGHT_PER_MINUTE, LIGHT_BURST)
+        if user_id in self.premium:
+            return rate * PREMIUM_RATE_MULTIPLIER / 60, burst * PREMIUM_RATE_MULTIPLIER
+        return rate / 60, burst
+
+    @staticmethod
+    def _refill(bucket, rate, burst, now):
+        bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+
+    def admit(self, user_id, cls):
+        """Take a token for `user_id`, returning 0 or the seconds to wait."""
+        if user_id in self.exempt:
+            return 0
+        now = time.monotonic()
+        if now - self._last_sweep > SWEEP_INTERVAL:
+            self.sweep(now)
+
+        rate, burst = self.limits(user_id, cls)
+        bucket = self.buckets.get((user_id, cls))
+        if bucket is None:
+            bucket = self.buckets[(user_id, cls)] = [burst, now]
+        else:
+            self._refill(bucket, rate, burst, now)
+        if bucket[0] < 1:
+            self.rejected[cls] += 1
+            return (1 - bucket[0]) / rate
+
+        shared = cls == HEAVY and user_id not in self.premium
+        if shared:
+            free_rate = FREE_HEAVY_PER_MINUTE / 60
+            self._refill(self.free_heavy, free_rate, FREE_HEAVY_PER_MINUTE, now)
+            if self.free_heavy[0] < 1:
+                self.rejected[cls] += 1
+                return (1 - self.free_heavy[0]) / free_rate
+            self.free_heavy[0] -= 1
+        bucket[0] -= 1
+        return 0
+
+    def should_notify(self, user_id, wait):
+        """Tell a user they're limited once per wait window, not on every message."""
+        now = time.monotonic()
+        if self.notified.get(user_id, 0) > now:
+            return False
+        self.notified[user_id] = now + max(wait, 1)
+        return True
+
+    def sweep(self, now=None):
+        now = now or time.monotonic()
+        self._last_sweep = now
+        for key, bucket in list(self.buckets.items()):
+            rate, burst = self.limits(*key)
+            if bucket[0] + (now - bucket[1]) * rate >= burst:
+                del self.buckets[key]
+        for user_id, until in list(self.notified.items()):
+            if until <= now:
+                del self.notified[user_id]
+
+    def status(self):
+        return (
+            f"Tracked buckets: {len(self.buckets)}\n"
+            f"Premium users cached: {len(self.premium)}\n"
+            f"Free heavy tokens left: {self.free_heavy[0]:.1f} / {FREE_HEAVY_PER_MINUTE:g}\n"
+            f"Rejected: heavy {self.rejected[HEAVY]} | light {self.rejected[LIGHT]}"
+        )
+
+
+admission = AdmissionControl()
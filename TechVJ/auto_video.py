@@ -1,51 +1,67 @@
 import os
 import time
+import asyncio
 import yt_dlp
-from pyrogram import Client, filters
-from pyrogram.types import Message
+from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
+from TechVJ.delivery import send_video, send_audio
+from TechVJ.cookies import cookie_pool
+from db import record_download
 
 VIDEO_SITES = ["youtube.com", "youtu.be", "facebook.com", "fb.watch", "tiktok.com", "instagram.com", "vimeo.com"]
 
+FORMATS = {
+    "video": "bestvideo+bestaudio/best",
+    # Audio-only streams first, the full file only when the site has nothing else
+    "audio": "bestaudio[ext=m4a]/bestaudio/best"
+}
+
+mode_buttons = InlineKeyboardMarkup([[
+    InlineKeyboardButton("🎬 Video", callback_data="dl:video"),
+    InlineKeyboardButton("🎵 Audio Only", callback_data="dl:audio")
+]])
+
 def is_video_link(url: str) -> bool:
     return any(domain in url.lower() for domain in VIDEO_SITES)
 
-@Client.on_message(filters.private & filters.text)
-async def auto_video_downloader(client, message: Message):
-    url = message.text.strip()
-    if not url.startswith("http") or not is_video_link(url):
-        return
+def download(url, mode, name):
+    os.makedirs("downloads", exist_ok=True)
+    ydl_opts = {
+        "outtmpl": f"downloads/{name}.%(ext)s",
+        "format": FORMATS[mode],
+        "quiet": True,
+    }
+    if mode == "video":
+        ydl_opts["merge_output_format"] = "mp4"
 
-    status = await message.reply("⏳ Fetching video info...")
+    with cookie_pool.use(url) as jar, yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        cookie_pool.apply(ydl, jar)
+        info = ydl.extract_info(url, download=True)
+        file_path = ydl.prepare_filename(info)
+        if mode == "video" and not file_path.endswith(".mp4"):
+            file_path = file_path.rsplit(".", 1)[0] + ".mp4"
+    return file_path, info
 
+async def process_link(client, message: Message, url, mode, status: Message):
+    """Download `url` and send it back as video or audio. Shared by every entry point."""
+    file_path = None
     try:
-        timestamp = int(time.time())
-        os.makedirs("downloads", exist_ok=True)
-        output_template = f"downloads/video_{timestamp}.%(ext)s"
-        ydl_opts = {
-            "outtmpl": output_template,
-            "format": "bestvideo+bestaudio/best",
-            "merge_output_format": "mp4",
-            "quiet": True,
-        }
-
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            file_path = ydl.prepare_filename(info)
-            if not file_path.endswith(".mp4"):
-                file_path = file_path.rsplit(".", 1)[0] + ".mp4"
-
-        await status.edit("⬆️ Uploading video to Telegram...")
-        await message.reply_video(
-            video=file_path,
-            caption=f"✅ Downloaded from {info.get('webpage_url')}"
-        )
+        name = f"{mode}_{message.chat.id}_{message.id}_{int(time.time())}"
+        file_path, info = await asyncio.to_thread(download, url, mode, name)
+
+        await status.edit(f"⬆️ Uploading {mode} to Telegram...")
+        caption = f"✅ Downloaded from {info.get('webpage_url')}"
+        if mode == "audio":
+            _, size = await send_audio(client, message.chat.id, file_path, info, caption=caption, reply_to_message_id=message.id)
+        else:
+            _, size = await send_video(client, message.chat.id, file_path, caption=caption, reply_to_message_id=message.id)
+        await record_download(size)
 
     except Exception as e:
         print(f"Download Error: {e}")
-        await status.edit("❌ Failed to download the video.")
+        await status.edit(f"❌ Failed to download the {mode}.")
         return
 
     finally:
-        if os.path.exists(file_path):
+        if file_path and os.path.exists(file_path):
             os.remove(file_path)
-        await status.delete()
\ No newline at end of file
+    await status.delete()
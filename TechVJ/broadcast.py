@@ -1,16 +1,32 @@
 from pyrogram.errors import InputUserDeactivated, UserNotParticipant, FloodWait, UserIsBlocked, PeerIdInvalid
 from TechVJ.db import db
-from pyrogram import Client, filters
-from config import OWNER_ID
+from TechVJ.token_pool import pool
+from config import LONG_FLOOD_WAIT
 import asyncio
-import datetime
 import time
 
-async def broadcast_messages(user_id, message):
+async def broadcast_messages(user_id, message, worker=None, mirror=None):
+    if worker is not None and not worker.is_main:
+        try:
+            await worker.pace()
+            await worker.client.copy_message(chat_id=user_id, from_chat_id=mirror.chat.id, message_id=mirror.id)
+            worker.sent += 1
+            return True, "Success"
+        except FloodWait:
+            raise
+        except Exception:
+            # Helper bots can only reach users who started them, the main bot takes over
+            return None, "Fallback"
     try:
+        if worker is not None:
+            await worker.pace()
         await message.copy(chat_id=user_id)
+        if worker is not None:
+            worker.sent += 1
         return True, "Success"
     except FloodWait as e:
+        if worker is not None:
+            raise
         await asyncio.sleep(e.value)
         return await broadcast_messages(user_id, message)
     except InputUserDeactivated:
@@ -26,44 +42,28 @@ async def broadcast_messages(user_id, message):
         return False, "Error"
 
 
-@Client.on_message(filters.command("broadcast") & filters.user(OWNER_ID) & filters.reply)
-async def verupikkals(bot, message):
-    users = await db.get_all_users()
-    b_msg = message.reply_to_message
-    if not b_msg:
-        return await message.reply_text("**Reply This Command To Your Broadcast Message**")
-    sts = await message.reply_text(
-        text='Broadcasting your messages...'
-    )
-    start_time = time.time()
-    total_users = await db.total_users_count()
-    done = 0
-    blocked = 0
-    deleted = 0
-    failed =0
-
-    success = 0
-    async for user in users:
-        if 'id' in user:
-            pti, sh = await broadcast_messages(int(user['id']), b_msg)
-            if pti:
-                success += 1
-            elif pti == False:
-                if sh == "Blocked":
-                    blocked += 1
-                elif sh == "Deleted":
-                    deleted += 1
-                elif sh == "Error":
-                    failed += 1
-            done += 1
-            if not done % 20:
-                await sts.edit(f"Broadcast in progress:\n\nTotal Users {total_users}\nCompleted: {done} / {total_users}\nSuccess: {success}\nBlocked: {blocked}\nDeleted: {deleted}")    
-        else:
-            # Handle the case where 'id' key is missing in the user dictionary
-            done += 1
-            failed += 1
-            if not done % 20:
-                await sts.edit(f"Broadcast in progress:\n\nTotal Users {total_users}\nCompleted: {done} / {total_users}\nSuccess: {success}\nBlocked: {blocked}\nDeleted: {deleted}")    
-    
-    time_taken = datetime.timedelta(seconds=int(time.time()-start_time))
-    await sts.edit(f"Broadcast Completed:\nCompleted in {time_taken} seconds.\n\nTotal Users {total_users}\nCompleted: {done} / {total_users}\nSuccess: {success}\nBlocked: {blocked}\nDeleted: {deleted}")
+async def broadcast_worker(worker, queue, message, mirror, on_result, fallback=None):
+    while True:
+        user_id = await queue.get()
+        try:
+            if not worker.available:
+                # Benched token, leave the job to the others until the wait is over
+                queue.put_nowait(user_id)
+                await asyncio.sleep(worker.benched_until - time.monotonic())
+                continue
+            try:
+                pti, sh = await broadcast_messages(user_id, message, worker, mirror)
+            except FloodWait as e:
+                queue.put_nowait(user_id)
+                if e.value > LONG_FLOOD_WAIT:
+                    worker.bench(e.value)
+                else:
+                    worker.hold(e.value)
+                await asyncio.sleep(e.value)
+                continue
+            if sh == "Fallback":
+                fallback.put_nowait(user_id)
+                continue
+            on_result(pti, sh)
+        finally:
+            queue.task_done()
@@ -0,0 +1,127 @@
+import base64
+import struct
+import ipaddress
+from config import API_ID
+
+# Pyrogram v2 session string layout, plus the two older ones it still accepts
+PYROGRAM_FORMAT = ">BI?256sQ?"
+PYROGRAM_OLD_FORMAT = ">B?256sI?"
+PYROGRAM_OLD_FORMAT_64 = ">B?256sQ?"
+PYROGRAM_OLD_SIZE = 351
+PYROGRAM_OLD_SIZE_64 = 356
+
+# Telethon StringSession: version char + base64 of dc, ip, port, auth key
+TELETHON_VERSION = "1"
+TELETHON_FORMAT = ">B{}sH256s"
+TELETHON_PORT = 443
+
+DC_PROD = {1: "149.154.175.53", 2: "149.154.167.51", 3: "149.154.175.100", 4: "149.154.167.91", 5: "91.108.56.130"}
+DC_TEST = {1: "149.154.175.10", 2: "149.154.167.40", 3: "149.154.175.117"}
+
+def _b64decode(string):
+    return base64.urlsafe_b64decode(string + "=" * (-len(string) % 4))
+
+
+def _check_dc(dc_id, test_mode):
+    if dc_id not in (DC_TEST if test_mode else DC_PROD):
+        raise ValueError(f"Unknown {'test ' if test_mode else ''}DC {dc_id}")
+
+
+def _unpack(fmt, packed):
+    fields = struct.unpack(fmt, packed)
+    # Bool bytes other than 0 / 1 mean this isn't a session string at all
+    if struct.pack(fmt, *fields) != packed:
+        raise ValueError("Not a Pyrogram or Telethon session string")
+    return fields
+
+
+def decode_session(string):
+    """Return the fields of a Pyrogram or Telethon session string.
+
+    Raises ValueError when the string is neither.
+    """
+    string = string.strip()
+    if string.startswith(TELETHON_VERSION) and len(string) in (353, 369):
+        ip_len = 4 if len(string) == 353 else 16
+        try:
+            dc_id, ip, port, auth_key = struct.unpack(TELETHON_FORMAT.format(ip_len), _b64decode(string[1:]))
+        except (ValueError, struct.error):
+            raise ValueError("Broken Telethon session string")
+        ip = ipaddress.ip_address(ip).compressed
+        _check_dc(dc_id, ip in DC_TEST.values())
+        return dict(
+            type="telethon", dc_id=dc_id, api_id=None, test_mode=ip in DC_TEST.values(),
+            auth_key=auth_key, user_id=None, is_bot=None, ip=ip, port=port
+        )
+    try:
+        packed = _b64decode(string)
+    except ValueError:
+        raise ValueError("Not a Pyrogram or Telethon session string")
+    if len(string) in (PYROGRAM_OLD_SIZE, PYROGRAM_OLD_SIZE_64):
+        fmt = PYROGRAM_OLD_FORMAT if len(string) == PYROGRAM_OLD_SIZE else PYROGRAM_OLD_FORMAT_64
+        if len(packed) == struct.calcsize(fmt):
+            dc_id, test_mode, auth_key, user_id, is_bot = _unpack(fmt, packed)
+            _check_dc(dc_id, test_mode)
+            return dict(
+                type="pyrogram_old", dc_id=dc_id, api_id=None, test_mode=test_mode,
+                auth_key=auth_key, user_id=user_id, is_bot=is_bot
+            )
+    if len(packed) == struct.calcsize(PYROGRAM_FORMAT):
+        dc_id, api_id, test_mode, auth_key, user_id, is_bot = _unpack(PYROGRAM_FORMAT, packed)
+        _check_dc(dc_id, test_mode)
+        return dict(
+            type="pyrogram", dc_id=dc_id, api_id=api_id, test_mode=test_mode,
+            auth_key=auth_key, user_id=user_id, is_bot=is_bot
+        )
+    raise ValueError("Not a Pyrogram or Telethon session string")
+
+
+def to_pyrogram(session, user_id=None, is_bot=None, api_id=None):
+    user_id = user_id or session["user_id"]
+    if not user_id:
+        raise ValueError("The user id is needed to build a Pyrogram string")
+    if user_id >= 2 ** 63:
+        raise ValueError(f"User id {user_id} is out of range")
+    if is_bot is None:
+        is_bot = bool(session["is_bot"])
+    packed = struct.pack(
+        PYROGRAM_FORMAT,
+        session["dc_id"],
+        api_id or session["api_id"] or API_ID,
+        session["test_mode"],
+        session["auth_key"],
+        user_id,
+        is_bot
+    )
+    return base64.urlsafe_b64encode(packed).decode().rstrip("=")
+
+
+def to_telethon(session):
+    ip = session.get("ip") or (DC_TEST if session["test_mode"] else DC_PROD)[session["dc_id"]]
+    ip = ipaddress.ip_address(ip).packed
+    packed = struct.pack(
+        TELETHON_FORMAT.format(len(ip)),
+        session["dc_id"],
+        ip,
+        session.get("port") or TELETHON_PORT,
+        session["auth_key"]
+    )
+    return TELETHON_VERSION + base64.urlsafe_b64encode(packed).decode("ascii")
+
+
+def convert_line(line):
+    """Convert one `string [user_id] [bot]` line, returning (info, converted)."""
+    parts = line.split()
+    string = parts[0]
+    user_id = next((int(p) for p in parts[1:] if p.isdigit()), None)
+    is_bot = True if "bot" in (p.lower() for p in parts[1:]) else None
+    session = decode_session(string)
+    kind = "Telethon" if session["type"] == "telethon" else "Pyrogram"
+    info = f"{kind} | DC {session['dc_id']}" + (" (test)" if session["test_mode"] else "")
+    if session["user_id"]:
+        info += f" | User `{session['user_id']}`"
+    if session["is_bot"] is not None:
+        info += f" | Bot: {'Yes' if session['is_bot'] else 'No'}"
+    if session["type"] == "telethon":
+        return info, to_pyrogram(session, user_id, is_bot)
+    return info, to_telethon(session)
@@ -0,0 +1,167 @@
+import os
+import glob
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from http.cookiejar import Cookie
+from urllib.parse import urlparse
+from config import COOKIE_FILE, COOKIE_DIR, COOKIE_SIDELINE
+
+# Short links share the cookies of the site they redirect to
+DOMAIN_ALIASES = {"youtu.be": "youtube.com", "fb.watch": "facebook.com"}
+
+# yt-dlp errors that mean the site is throttling or walling this jar
+THROTTLE_MARKERS = (
+    "429", "too many requests", "rate-limit", "rate limit", "login required",
+    "sign in to confirm", "log in", "login_required", "not a bot"
+)
+
+
+def parse_cookie_file(path):
+    """Read a Netscape cookies.txt, also when tabs were turned into spaces."""
+    cookies = []
+    now = time.time()
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            line = line.strip()
+            http_only = line.startswith("#HttpOnly_")
+            if http_only:
+                line = line[len("#HttpOnly_"):]
+            elif not line or line.startswith("#"):
+                continue
+            fields = line.split("\t")
+            if len(fields) < 7:
+                fields = line.split(None, 6)
+            if len(fields) < 7:
+                continue
+            domain, _, path_, secure, expires, name, value = (x.strip() for x in fields[:7])
+            expires = int(expires) if expires.isdigit() and int(expires) else None
+            if expires and expires < now:
+                continue
+            cookies.append(Cookie(
+                0, name, value, None, False,
+                domain, True, domain.startswith("."),
+                path_, True, secure.upper() == "TRUE", expires, False,
+                None, None, {"HttpOnly": None} if http_only else {}
+            ))
+    return cookies
+
+
+def site_of(url):
+    host = (urlparse(url).hostname or "").lower()
+    for alias, site in DOMAIN_ALIASES.items():
+        if host == alias or host.endswith("." + alias):
+            return site
+    return host
+
+
+class Jar:
+
+    def __init__(self, path, cookies):
+        self.path = path
+        self.cookies = cookies
+        self.domains = {c.domain.lstrip(".").lower() for c in cookies}
+        self.ok = 0
+        self.failed = 0
+        self.latency = 0.0
+        self.sidelined_until = 0.0
+        self.last_used = 0.0
+
+    def covers(self, site):
+        return any(site == d or site.endswith("." + d) or d.endswith("." + site) for d in self.domains)
+
+    @property
+    def score(self):
+        # Smoothed success rate, slow jars lose a little
+        return (self.ok + 1) / (self.ok + self.failed + 2) / (1 + self.latency / 30)
+
+    @property
+    def sidelined(self):
+        return time.monotonic() < self.sidelined_until
+
+
+class CookiePool:
+    """Cookie jars parsed once at startup and rotated per site.
+
+    Each download takes the least recently used healthy jar for its site.
+    Jars that hit a throttle or login wall are sidelined for COOKIE_SIDELINE
+    seconds and the others carry on.
+    """
+
+    def __init__(self, files):
+        self.jars = []
+        self._lock = threading.Lock()
+        seen = set()
+        for path in files:
+            if not os.path.isfile(path):
+                continue
+            with open(path, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+            if digest in seen:
+                continue
+            seen.add(digest)
+            try:
+                cookies = parse_cookie_file(path)
+            except OSError as e:
+                print(f"Failed to load cookies from {path}: {e}")
+                continue
+            if cookies:
+                self.jars.append(Jar(path, cookies))
+        print(f"Cookie pool loaded {len(self.jars)} jar(s)")
+
+    def pick(self, url):
+        site = site_of(url)
+        with self._lock:
+            jars = [j for j in self.jars if j.covers(site) and not j.sidelined]
+            if not jars:
+                return None
+            best = max(j.score for j in jars)
+            jar = min((j for j in jars if j.score >= best / 2), key=lambda j: j.last_used)
+            jar.last_used = time.monotonic()
+            return jar
+
+    def report(self, jar, ok, took, error=None):
+        if jar is None:
+            return
+        with self._lock:
+            jar.latency = took if not (jar.ok + jar.failed) else jar.latency * 0.8 + took * 0.2
+            if ok:
+                jar.ok += 1
+                return
+            jar.failed += 1
+            if error and any(m in error.lower() for m in THROTTLE_MARKERS):
+                jar.sidelined_until = time.monotonic() + COOKIE_SIDELINE
+                print(f"Cookie jar {jar.path} throttled, sidelined for {COOKIE_SIDELINE}s")
+
+    @staticmethod
+    def apply(ydl, jar):
+        if jar is None:
+            return
+        for cookie in jar.cookies:
+            ydl.cookiejar.set_cookie(cookie)
+
+    @contextmanager
+    def use(self, url):
+        """Pick a jar for `url` and record how the download went."""
+        jar = self.pick(url)
+        start = time.monotonic()
+        try:
+            yield jar
+        except Exception as e:
+            self.report(jar, False, time.monotonic() - start, str(e))
+            raise
+        self.report(jar, True, time.monotonic() - start)
+
+    def status(self):
+        lines = []
+        for j in self.jars:
+            state = "💤 sidelined" if j.sidelined else "✅ active"
+            lines.append(
+                f"`{j.path}` ({', '.join(sorted(j.domains))})\n"
+                f"   {state} | ok {j.ok} | failed {j.failed} | {j.latency:.1f}s avg"
+            )
+        return "\n".join(lines) or "No cookie files loaded."
+
+
+cookie_pool = CookiePool([COOKIE_FILE, "youtube_cookies.txt"] + sorted(glob.glob(os.path.join(COOKIE_DIR, "*.txt"))))
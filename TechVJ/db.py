@@ -7,6 +7,7 @@ class Database:
         self._client = motor.motor_asyncio.AsyncIOMotorClient(uri)
         self.db = self._client[database_name]
         self.col = self.db.users
+        self.stats = self.db.stats
 
     def new_user(self, id, name):
         return dict(
@@ -17,19 +18,27 @@ class Database:
     async def add_user(self, id, name):
         user = self.new_user(id, name)
         await self.col.insert_one(user)
+        await self.stats.update_one({'_id': 'users'}, {'$inc': {'count': 1}})
     
     async def is_user_exist(self, id):
         user = await self.col.find_one({'id':int(id)})
         return bool(user)
     
     async def total_users_count(self):
+        # Kept by add_user / delete_user, counted from the collection only the first time
+        counter = await self.stats.find_one({'_id': 'users'})
+        if counter:
+            return counter['count']
         count = await self.col.count_documents({})
+        await self.stats.update_one({'_id': 'users'}, {'$setOnInsert': {'count': count}}, upsert=True)
         return count
 
     async def get_all_users(self):
         return self.col.find({})
 
     async def delete_user(self, user_id):
-        await self.col.delete_many({'id': int(user_id)})
+        result = await self.col.delete_many({'id': int(user_id)})
+        if result.deleted_count:
+            await self.stats.update_one({'_id': 'users'}, {'$inc': {'count': -result.deleted_count}})
 
 db = Database(MONGO_DB_URI, "techvj")
@@ -0,0 +1,114 @@
+import os
+from pyrogram.types import InputMediaPhoto, InputMediaVideo, InputMediaDocument, InputMediaAudio
+from config import MAX_UPLOAD_SIZE
+from TechVJ.media import split_video, prepare_video, extract_audio, cover_art
+from TechVJ.token_pool import pool
+
+# Telegram takes at most 10 items per media group
+MEDIA_GROUP_SIZE = 10
+
+MEDIA_TYPES = {
+    "photo": InputMediaPhoto,
+    "video": InputMediaVideo,
+    "document": InputMediaDocument,
+    "audio": InputMediaAudio
+}
+
+
+def _kind(media):
+    return next(kind for kind, cls in MEDIA_TYPES.items() if isinstance(media, cls))
+
+
+def _file_id(message, kind):
+    return getattr(message, kind).file_id
+
+
+async def _send(client, chat_id, chunk):
+    if len(chunk) == 1:
+        media = chunk[0]
+        kind = _kind(media)
+        return [await getattr(client, f"send_{kind}")(chat_id, media.media, caption=media.caption)]
+    return await client.send_media_group(chat_id, chunk)
+
+
+async def fan_out_media(client, chat_ids, media):
+    """Upload `media` once to the first chat and send it to the rest by file_id.
+
+    Returns a dict of chat id to sent messages. Failures for the later chats
+    are logged and give an empty list. A failed upload to the first chat is
+    raised.
+    """
+    first, rest = chat_ids[0], chat_ids[1:]
+    sent = {first: []}
+    cached = []
+    for i in range(0, len(media), MEDIA_GROUP_SIZE):
+        chunk = media[i:i + MEDIA_GROUP_SIZE]
+        messages = await _send(client, first, chunk)
+        sent[first] += messages
+        cached += [
+            MEDIA_TYPES[_kind(item)](_file_id(msg, _kind(item)), caption=item.caption)
+            for item, msg in zip(chunk, messages)
+        ]
+
+    for chat_id in rest:
+        sent[chat_id] = []
+        try:
+            for i in range(0, len(cached), MEDIA_GROUP_SIZE):
+                sent[chat_id] += await _send(client, chat_id, cached[i:i + MEDIA_GROUP_SIZE])
+        except Exception as e:
+            print(f"Failed to deliver media to {chat_id}: {e}")
+    return sent
+
+
+async def send_video(client, chat_id, path, caption=None, reply_to_message_id=None):
+    """Send a local video with streaming metadata, split into parts when it is over MAX_UPLOAD_SIZE.
+
+    Returns the sent messages and the bytes uploaded.
+    """
+    size = os.path.getsize(path)
+    if size <= MAX_UPLOAD_SIZE:
+        return [await pool.send_media(
+            client, "send_video", chat_id, path,
+            caption=caption, reply_to_message_id=reply_to_message_id, **await prepare_video(path)
+        )], size
+
+    sent, size = [], 0
+    async for part in split_video(path, MAX_UPLOAD_SIZE):
+        meta = {k: part[k] for k in ("duration", "width", "height", "thumb", "supports_streaming")}
+        label = f"{part['index']}/{part['total']}" if part["total"] else part["index"]
+        try:
+            sent.append(await pool.send_media(
+                client, "send_video", chat_id, part["path"],
+                caption=f"{caption or ''}\n\n📦 Part {label}".strip(),
+                reply_to_message_id=reply_to_message_id,
+                **meta
+            ))
+            size += os.path.getsize(part["path"])
+        finally:
+            for f in (part["path"], part["thumb"]):
+                if f and os.path.exists(f):
+                    os.remove(f)
+    return sent, size
+
+
+async def send_audio(client, chat_id, path, info, caption=None, reply_to_message_id=None):
+    """Send the audio track of a download with its cover art, no transcoding.
+
+    Returns the sent messages and the bytes uploaded.
+    """
+    cover = await cover_art(info.get("thumbnail"))
+    audio, duration = await extract_audio(path, cover)
+    try:
+        sent = [await pool.send_media(
+            client, "send_audio", chat_id, audio,
+            caption=caption,
+            reply_to_message_id=reply_to_message_id,
+            duration=duration,
+            title=info.get("track") or info.get("title"),
+            performer=info.get("artist") or info.get("uploader"),
+            thumb=cover
+        )]
+        return sent, os.path.getsize(audio)
+    finally:
+        if os.path.exists(audio):
+            os.remove(audio)
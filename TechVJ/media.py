@@ -0,0 +1,348 @@
+import io
+import os
+import json
+import struct
+import asyncio
+import hashlib
+import aiohttp
+from PIL import Image
+
+THUMB_DIR = "downloads/thumbs"
+THUMB_CACHE_SIZE = 200
+
+# Containers that take each audio codec as a plain stream copy
+AUDIO_CONTAINERS = {"aac": "m4a", "alac": "m4a", "opus": "ogg", "vorbis": "ogg", "mp3": "mp3", "flac": "flac"}
+# Containers that can carry the cover art as an attached picture
+COVER_CONTAINERS = ("m4a", "mp3")
+
+# Keep parts a little under the limit, container overhead isn't in the packet sizes.
+# A part that still comes out too big makes the rest get planned tighter.
+SPLIT_MARGIN = 0.97
+
+
+async def run(*cmd, output=None):
+    """Run a command without blocking the loop and return (returncode, stdout).
+
+    When the caller is cancelled the process is killed and its half-written
+    `output` file removed.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL, stdin=asyncio.subprocess.DEVNULL
+    )
+    try:
+        stdout, _ = await proc.communicate()
+    except asyncio.CancelledError:
+        if proc.returncode is None:
+            proc.kill()
+        await proc.wait()
+        if output and os.path.exists(output):
+            os.remove(output)
+        raise
+    return proc.returncode, stdout
+
+
+async def probe(path):
+    """Duration, size and video stream of a file from a single ffprobe call."""
+    _, out = await run(
+        "ffprobe", "-v", "error", "-show_format", "-show_streams", "-of", "json", path
+    )
+    try:
+        data = json.loads(out or b"{}")
+    except ValueError:
+        data = {}
+    video = next(
+        (st for st in data.get("streams", []) if st.get("codec_type") == "video"
+         and not st.get("disposition", {}).get("attached_pic")),
+        {}
+    )
+    audio = next((st for st in data.get("streams", []) if st.get("codec_type") == "audio"), {})
+    try:
+        duration = float(data.get("format", {}).get("duration", 0))
+    except ValueError:
+        duration = 0.0
+    return dict(
+        duration=duration,
+        video_index=video.get("index"),
+        width=video.get("width", 0),
+        height=video.get("height", 0),
+        audio_codec=audio.get("codec_name")
+    )
+
+
+def moov_first(path):
+    """Whether the MP4 index (moov) comes before the media data (mdat).
+
+    Only the top-level box headers are read. Returns None for files that
+    aren't MP4.
+    """
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            size, kind = struct.unpack(">I4s", header)
+            if kind == b"moov":
+                return True
+            if kind == b"mdat":
+                return False
+            if size == 1:
+                size = struct.unpack(">Q", f.read(8))[0] - 8
+            elif size == 0:
+                return None
+            if size < 8:
+                return None
+            f.seek(size - 8, os.SEEK_CUR)
+
+
+async def faststart(path):
+    """Move the moov atom to the front with a stream copy, only when needed."""
+    if moov_first(path) is not False:
+        return path
+    tmp = f"{path}.faststart.mp4"
+    code, _ = await run(
+        "ffmpeg", "-v", "error", "-y", "-i", path, "-map", "0", "-c", "copy", "-movflags", "+faststart", tmp,
+        output=tmp
+    )
+    if code == 0 and os.path.exists(tmp):
+        os.replace(tmp, path)
+    elif os.path.exists(tmp):
+        os.remove(tmp)
+    return path
+
+
+async def thumbnail(path, duration=0):
+    """Thumbnail for a video, extracted once and kept in THUMB_DIR."""
+    st = os.stat(path)
+    key = hashlib.sha1(f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}".encode()).hexdigest()
+    out = os.path.join(THUMB_DIR, f"{key}.jpg")
+    if os.path.exists(out):
+        return out
+    os.makedirs(THUMB_DIR, exist_ok=True)
+    _prune_thumbnails()
+    return await extract_thumbnail(path, out, at=min(max(duration * 0.1, 0), 5.0))
+
+
+def _prune_thumbnails():
+    thumbs = sorted(
+        (os.path.join(THUMB_DIR, f) for f in os.listdir(THUMB_DIR)),
+        key=os.path.getmtime
+    )
+    for f in thumbs[:max(len(thumbs) - THUMB_CACHE_SIZE + 1, 0)]:
+        os.remove(f)
+
+
+async def cover_art(url):
+    """The info thumbnail as a Telegram-sized JPEG, cached in THUMB_DIR by URL."""
+    if not url:
+        return None
+    out = os.path.join(THUMB_DIR, f"{hashlib.sha1(url.encode()).hexdigest()}.jpg")
+    if os.path.exists(out):
+        return out
+    os.makedirs(THUMB_DIR, exist_ok=True)
+    _prune_thumbnails()
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url, headers={"User-Agent": "Mozilla/5.0"}) as resp:
+                if resp.status != 200:
+                    return None
+                data = await resp.read()
+        await asyncio.to_thread(_save_cover, data, out)
+    except Exception as e:
+        print(f"Cover art error: {e}")
+        return None
+    return out
+
+
+def _save_cover(data, out):
+    img = Image.open(io.BytesIO(data)).convert("RGB")
+    img.thumbnail((320, 320))
+    img.save(out, "JPEG", quality=85)
+
+
+async def extract_audio(path, cover=None):
+    """Remux the first audio stream into a matching container without re-encoding."""
+    info = await probe(path)
+    ext = AUDIO_CONTAINERS.get(info["audio_codec"], "mka")
+    out = f"{path.rsplit('.', 1)[0]}.audio.{ext}"
+    cmd = ["ffmpeg", "-v", "error", "-y", "-i", path]
+    if cover and ext in COVER_CONTAINERS:
+        cmd += ["-i", cover, "-map", "0:a:0", "-map", "1:v", "-c", "copy", "-disposition:v:0", "attached_pic"]
+    else:
+        cmd += ["-map", "0:a:0", "-c", "copy"]
+    code, _ = await run(*cmd, out, output=out)
+    if code != 0 or not os.path.exists(out):
+        raise RuntimeError("ffmpeg failed to extract the audio")
+    return out, int(info["duration"])
+
+
+async def prepare_video(path):
+    """Metadata for send_video so Telegram clients can stream right away."""
+    await faststart(path)
+    info = await probe(path)
+    return dict(
+        duration=int(info["duration"]),
+        width=info["width"],
+        height=info["height"],
+        thumb=await thumbnail(path, info["duration"]),
+        supports_streaming=True
+    )
+
+
+async def keyframes(path, video_index):
+    """Video keyframe times with the number of bytes stored before each one.
+
+    Only packet headers are read, nothing gets decoded.
+    """
+    _, out = await run(
+        "ffprobe", "-v", "error", "-show_entries", "packet=stream_index,pts_time,size,flags",
+        "-of", "csv=p=0", path
+    )
+    points = []
+    total = 0
+    for line in out.decode().splitlines():
+        fields = line.split(",")
+        if len(fields) < 4 or fields[1] == "N/A":
+            continue
+        stream, pts, size, flags = int(fields[0]), float(fields[1]), int(fields[2]), fields[3]
+        if stream == video_index and flags.startswith("K"):
+            points.append((pts, total))
+        total += size
+    return points, total
+
+
+def plan_cuts(points, budget, start=0.0, total=None):
+    """Pick keyframes to cut at so every part from `start` on stays under `budget` bytes.
+
+    `total` is the size of the whole stream, so the bytes after the last
+    keyframe count for the last part too. Returns (start, end) pairs in
+    seconds, end is None for the last part.
+    """
+    cuts = []
+    start_time = start
+    start_bytes = next((offset for pts, offset in points if pts >= start), 0)
+    last = None
+    for pts, offset in points:
+        if pts <= start_time:
+            continue
+        if offset - start_bytes > budget and last:
+            cuts.append((start_time, last[0]))
+            start_time, start_bytes = last
+        if offset - start_bytes > budget:
+            # A single GOP bigger than the budget leaves no better choice
+            cuts.append((start_time, pts))
+            start_time, start_bytes = pts, offset
+            last = None
+            continue
+        last = (pts, offset)
+    if total is not None and total - start_bytes > budget and last:
+        cuts.append((start_time, last[0]))
+        start_time = last[0]
+    cuts.append((start_time, None))
+    return cuts
+
+
+async def cut_part(path, start, end, out):
+    # Input seeking with stream copy lands on the keyframe at `start`
+    cmd = ["ffmpeg", "-v", "error", "-y", "-ss", f"{start + 0.001:.3f}", "-i", path]
+    if end is not None:
+        cmd += ["-t", f"{end - start:.3f}"]
+    cmd += [
+        "-map", "0:v:0", "-map", "0:a?", "-c", "copy",
+        "-avoid_negative_ts", "make_zero", "-movflags", "+faststart", out
+    ]
+    code, _ = await run(*cmd, output=out)
+    if code != 0 or not os.path.exists(out):
+        raise RuntimeError(f"ffmpeg failed to cut part {out}")
+    return out
+
+
+async def extract_thumbnail(path, out, at=1.0):
+    # Telegram wants thumbnails as JPEG within 320x320
+    await run(
+        "ffmpeg", "-v", "error", "-y", "-ss", str(at), "-i", path,
+        "-frames:v", "1", "-vf", "scale=320:320:force_original_aspect_ratio=decrease", "-q:v", "4", out,
+        output=out
+    )
+    return out if os.path.exists(out) else None
+
+
+async def split_video(path, limit):
+    """Yield size-bounded parts of `path`, cut on keyframes without re-encoding.
+
+    The next part is cut while the caller is still uploading the current one.
+    Each part is a dict with path, index, total and the send_video metadata
+    (thumb, duration, width, height). total is None once a re-plan changed
+    the part count after earlier parts went out. The caller deletes the
+    files once done with them.
+    """
+    info = await probe(path)
+    points, total = await keyframes(path, info["video_index"])
+    budget = limit * SPLIT_MARGIN
+    cuts = plan_cuts(points, budget, total=total)
+    base = path.rsplit(".", 1)[0]
+    queue = asyncio.Queue(maxsize=1)
+
+    async def producer():
+        nonlocal cuts, budget
+        # Parts already sent announced len(cuts), it can't change under them
+        counted = True
+        # Files of the part being made, removed if we're cancelled before queueing it
+        unqueued = []
+        try:
+            i = 0
+            while i < len(cuts):
+                start, end = cuts[i]
+                i += 1
+                out = await cut_part(path, start, end, f"{base}.part{i}.mp4")
+                unqueued = [out]
+                size = os.path.getsize(out)
+                if size > limit:
+                    # Muxing overhead was bigger than the margin, re-plan the rest tighter
+                    budget *= limit / size * SPLIT_MARGIN
+                    rest = plan_cuts(points, budget, start, total)
+                    if rest[0] == (start, end):
+                        os.remove(out)
+                        raise RuntimeError("No keyframe to split this video below the upload limit")
+                    if i > 1 and len(rest) != len(cuts) - (i - 1):
+                        counted = False
+                    cuts = cuts[:i - 1] + rest
+                    i -= 1
+                    continue
+                part = await probe(out)
+                thumb = await thumbnail(out, part["duration"])
+                unqueued.append(thumb)
+                await queue.put(dict(
+                    path=out, thumb=thumb, index=i, total=len(cuts) if counted else None,
+                    duration=int(part["duration"]), width=info["width"], height=info["height"],
+                    supports_streaming=True
+                ))
+                unqueued = []
+        except asyncio.CancelledError:
+            for f in unqueued:
+                if f and os.path.exists(f):
+                    os.remove(f)
+            raise
+        except Exception as e:
+            await queue.put(e)
+        await queue.put(None)
+
+    task = asyncio.create_task(producer())
+    try:
+        while True:
+            part = await queue.get()
+            if part is None:
+                break
+            if isinstance(part, Exception):
+                raise part
+            yield part
+    finally:
+        task.cancel()
+        # Let the producer kill ffmpeg and clean up before the queue is drained
+        await asyncio.gather(task, return_exceptions=True)
+        # Parts cut ahead that the caller never got
+        while not queue.empty():
+            part = queue.get_nowait()
+            if isinstance(part, dict):
+                for f in (part["path"], part["thumb"]):
+                    if f and os.path.exists(f):
+                        os.remove(f)
@@ -0,0 +1,124 @@
+import os
+import time
+import asyncio
+from pyrogram import Client
+from pyrogram.errors import FloodWait
+from config import API_ID, API_HASH, LOG_CHANNEL, HELPER_BOT_TOKENS, LONG_FLOOD_WAIT, HELPER_UPLOAD_MIN_SIZE
+
+# Telegram allows roughly 30 messages per second per bot token
+MESSAGES_PER_SECOND = 25
+
+
+class Worker:
+    """One bot token with its own pacing and FloodWait state."""
+
+    def __init__(self, client, name, is_main=False):
+        self.client = client
+        self.name = name
+        self.is_main = is_main
+        self.interval = 1 / MESSAGES_PER_SECOND
+        self.next_slot = 0.0
+        self.benched_until = 0.0
+        self.sent = 0
+        self.floods = 0
+
+    @property
+    def available(self):
+        return time.monotonic() >= self.benched_until
+
+    async def pace(self):
+        now = time.monotonic()
+        wait = self.next_slot - now
+        self.next_slot = max(now, self.next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def hold(self, seconds):
+        # A short FloodWait pauses every sender using this token
+        self.next_slot = max(self.next_slot, time.monotonic() + seconds)
+
+    def bench(self, seconds):
+        self.benched_until = time.monotonic() + seconds
+        self.floods += 1
+        print(f"{self.name} hit FloodWait of {seconds}s, taken out of rotation")
+
+
+class TokenPool:
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.main = None
+        self.helpers = []
+
+    @property
+    def workers(self):
+        return ([self.main] if self.main else []) + self.helpers
+
+    async def start(self, main_client):
+        self.main = Worker(main_client, "main", is_main=True)
+        for i, token in enumerate(self.tokens):
+            client = Client(
+                f"helper_{i}",
+                api_id=API_ID,
+                api_hash=API_HASH,
+                bot_token=token,
+                in_memory=True,
+                no_updates=True
+            )
+            try:
+                await client.start()
+            except Exception as e:
+                print(f"Failed to start helper bot {i}: {e}")
+                continue
+            self.helpers.append(Worker(client, f"helper_{i}"))
+        print(f"Token pool ready with {len(self.helpers)} helper bot(s)")
+
+    async def stop(self):
+        for worker in self.helpers:
+            try:
+                await worker.client.stop()
+            except Exception as e:
+                print(f"Failed to stop {worker.name}: {e}")
+        self.helpers = []
+
+    def pick(self, helpers_only=False):
+        candidates = [w for w in (self.helpers if helpers_only else self.workers) if w.available]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda w: w.next_slot)
+
+    async def send_media(self, client, method, chat_id, path, caption=None, reply_to_message_id=None, **kwargs):
+        """Send a local file with `method` (send_video, send_audio, ...).
+
+        Big files are uploaded by a helper bot into LOG_CHANNEL and then
+        delivered to `chat_id` by the main bot, which copies them by file_id.
+        """
+        if os.path.getsize(path) >= HELPER_UPLOAD_MIN_SIZE:
+            while True:
+                worker = self.pick(helpers_only=True)
+                if not worker:
+                    break
+                try:
+                    staged = await getattr(worker.client, method)(LOG_CHANNEL, path, caption=caption, **kwargs)
+                except FloodWait as e:
+                    if e.value > LONG_FLOOD_WAIT:
+                        worker.bench(e.value)
+                        continue
+                    await asyncio.sleep(e.value)
+                    continue
+                except Exception as e:
+                    print(f"{worker.name} upload failed, using main bot: {e}")
+                    break
+                return await client.copy_message(
+                    chat_id,
+                    LOG_CHANNEL,
+                    staged.id,
+                    caption=caption,
+                    reply_to_message_id=reply_to_message_id
+                )
+        return await getattr(client, method)(
+            chat_id, path, caption=caption, reply_to_message_id=reply_to_message_id, **kwargs
+        )
+
+
+pool = TokenPool(HELPER_BOT_TOKENS)
@@ -0,0 +1,175 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+from collections import deque
+from config import WATCHDOG_THRESHOLD, WATCHDOG_REPORT_FILE
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHECK_INTERVAL = 0.05
+# Stalls older than this drop out of the offender ranking
+OFFENDER_WINDOW = 600
+
+
+def _is_project_frame(frame):
+    path = os.path.abspath(frame.f_code.co_filename)
+    return path.startswith(ROOT) and "site-packages" not in path and path != os.path.abspath(__file__)
+
+
+def _where(frame):
+    return f"{os.path.relpath(frame.f_code.co_filename, ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}"
+
+
+class LoopWatchdog:
+    """Measures event loop lag and blames stalls on the code that caused them.
+
+    A coroutine ticks every CHECK_INTERVAL and stamps a heartbeat. A
+    thread watches the heartbeat and, once it is older than the
+    threshold, grabs the loop thread's stack. The outermost project frame
+    of the running task is the Pyrogram handler that was running and the innermost is the
+    blocking call.
+    """
+
+    def __init__(self, threshold, report_file=None, history=600, window=OFFENDER_WINDOW):
+        self.threshold = threshold
+        self.report_file = report_file
+        self.window = window
+        self.lags = deque(maxlen=history)
+        # (timestamp, (handler, call), lag) for every stall inside the window
+        self.stalls = deque(maxlen=history)
+        self._beat = time.monotonic()
+        self._captured_beat = None
+        self._pending = None
+        self._loop_thread_id = None
+        self._task = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._task:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._task = asyncio.get_event_loop().create_task(self._tick())
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _tick(self):
+        last_dump = time.monotonic()
+        while True:
+            start = time.monotonic()
+            self._beat = start
+            await asyncio.sleep(CHECK_INTERVAL)
+            lag = max(time.monotonic() - start - CHECK_INTERVAL, 0)
+            self.lags.append(lag)
+            if lag >= self.threshold:
+                pending, self._pending = self._pending, None
+                self._record(pending or ("unknown", "unknown"), lag)
+            if self.report_file and time.monotonic() - last_dump >= 10:
+                last_dump = time.monotonic()
+                self.dump()
+
+    def _watch(self):
+        while not self._stop.wait(CHECK_INTERVAL):
+            beat = self._beat
+            if time.monotonic() - beat < self.threshold or self._captured_beat == beat:
+                continue
+            self._captured_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._pending = self._attribute(frame)
+
+    def _attribute(self, frame):
+        handler = call = None
+        while frame is not None:
+            # Everything above the loop's callback runner belongs to the loop itself
+            if frame.f_code.co_name == "_run" and frame.f_code.co_filename.endswith(os.path.join("asyncio", "events.py")):
+                break
+            if _is_project_frame(frame) and frame.f_code.co_name != "<module>":
+                if call is None:
+                    call = _where(frame)
+                handler = frame
+            frame = frame.f_back
+        if handler is None:
+            return ("unknown", "unknown")
+        name = f"{os.path.relpath(handler.f_code.co_filename, ROOT)}:{handler.f_code.co_name}"
+        return (name, call)
+
+    def _record(self, key, lag):
+        self.stalls.append((time.monotonic(), key, lag))
+
+    def offenders(self):
+        """Stalls of the last `window` seconds summed up per handler and call."""
+        cutoff = time.monotonic() - self.window
+        while self.stalls and self.stalls[0][0] < cutoff:
+            self.stalls.popleft()
+        offenders = {}
+        for _, key, lag in list(self.stalls):
+            entry = offenders.setdefault(key, {"count": 0, "total": 0.0, "max": 0.0})
+            entry["count"] += 1
+            entry["total"] += lag
+            entry["max"] = max(entry["max"], lag)
+        return offenders
+
+    def report(self, top=10):
+        lags = sorted(self.lags)
+        offenders = sorted(self.offenders().items(), key=lambda kv: kv[1]["total"], reverse=True)[:top]
+        return {
+            "threshold_ms": round(self.threshold * 1000),
+            "window_s": self.window,
+            "lag_p50_ms": round(lags[len(lags) // 2] * 1000, 1) if lags else 0,
+            "lag_p99_ms": round(lags[int(len(lags) * 0.99)] * 1000, 1) if lags else 0,
+            "lag_max_ms": round(lags[-1] * 1000, 1) if lags else 0,
+            "offenders": [
+                {
+                    "handler": handler,
+                    "call": call,
+                    "count": v["count"],
+                    "total_ms": round(v["total"] * 1000),
+                    "max_ms": round(v["max"] * 1000)
+                }
+                for (handler, call), v in offenders
+            ]
+        }
+
+    def dump(self):
+        try:
+            with open(self.report_file, "w") as f:
+                json.dump(self.report(), f)
+        except Exception as e:
+            print(f"Failed to write watchdog report: {e}")
+
+
+def format_report(report):
+    lines = [
+        "**Event Loop Lag**",
+        f"p50: `{report['lag_p50_ms']} ms` | p99: `{report['lag_p99_ms']} ms` | max: `{report['lag_max_ms']} ms`",
+        f"Threshold: `{report['threshold_ms']} ms` | Blocking calls of the last `{report['window_s'] // 60} min`",
+        ""
+    ]
+    if not report["offenders"]:
+        lines.append("No blocking calls in this window.")
+    for i, o in enumerate(report["offenders"], 1):
+        lines.append(
+            f"{i}. `{o['handler']}`\n   `{o['call']}`\n   {o['count']}x, total {o['total_ms']} ms, max {o['max_ms']} ms"
+        )
+    return "\n".join(lines)
+
+
+def install_uvloop():
+    try:
+        import uvloop
+    except ImportError:
+        print("USE_UVLOOP is set but uvloop is not installed, using the default loop")
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+watchdog = LoopWatchdog(WATCHDOG_THRESHOLD, WATCHDOG_REPORT_FILE)
@@ -1,9 +1,20 @@
-from flask import Flask
+import json
+from flask import Flask, jsonify
+from config import WATCHDOG_REPORT_FILE
 app = Flask(__name__)
 
 @app.route('/')
 def hello_world():
     return 'TechVJ'
 
+@app.route('/lag')
+def lag_report():
+    # Written every few seconds by the bot process
+    try:
+        with open(WATCHDOG_REPORT_FILE) as f:
+            return jsonify(json.load(f))
+    except (OSError, ValueError):
+        return jsonify({"error": "watchdog report not available yet"}), 503
+
 if __name__ == "__main__":
     app.run()
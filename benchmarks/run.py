@@ -0,0 +1,273 @@
+"""Micro-benchmarks for the per-message and per-chunk hot paths.
+
+    python -m benchmarks.run --save before.json
+    python -m benchmarks.run --compare before.json --threshold 0.10
+
+Results are per-call timings. With --compare the run exits non-zero when a
+benchmark's median got slower than the saved one by more than the threshold.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import threading
+import importlib.util
+from functools import partial
+from datetime import datetime
+from http.server import ThreadingHTTPServer
+from loadtest.fakes import FakeClient, install_fake_mongo
+from loadtest.media_server import QuietHandler, make_clip
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SYSTEM_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+BENCHMARKS = {}
+
+
+def benchmark(name, needs=()):
+    def decorator(func):
+        BENCHMARKS[name] = (func, needs)
+        return func
+    return decorator
+
+
+def load_file(name, path):
+    # helpers/progress.py is shadowed by helpers.py, so load the files directly
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(func, rounds, min_time=0.05):
+    """Time `func` and return per-call seconds for each round."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        took = time.perf_counter() - start
+        if took >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+    # The calibration loop doubles as warm-up and is not recorded
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return times
+
+
+def measure_async(make_coro, rounds, min_time=0.05):
+    loop = asyncio.new_event_loop()
+    try:
+        return measure(lambda: loop.run_until_complete(make_coro()), rounds, min_time)
+    finally:
+        loop.close()
+
+
+class Fixtures:
+    """Lazily built shared inputs: test clip, payload server, fake client."""
+
+    def __init__(self):
+        self.tmp = tempfile.mkdtemp(prefix="bench_")
+        self._clip = None
+        self._server = None
+        self.client = FakeClient(latency=0)
+
+    @property
+    def clip(self):
+        if self._clip is None:
+            self._clip = make_clip(os.path.join(self.tmp, "clip.mp4"), seconds=20)
+        return self._clip
+
+    @property
+    def payload_url(self):
+        if self._server is None:
+            with open(os.path.join(self.tmp, "payload.bin"), "wb") as f:
+                f.write(os.urandom(16 * 1024 * 1024))
+            self._server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=self.tmp))
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/payload.bin"
+
+    def close(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+@benchmark("is_video_link")
+def bench_is_video_link(fx, rounds):
+    from TechVJ.auto_video import is_video_link
+    urls = [
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://example.com/some/long/path/that/does/not/match/anything?x=1",
+        "hello there, not a link at all"
+    ]
+    return measure(lambda: [is_video_link(u) for u in urls], rounds)
+
+
+def _progress(path, args):
+    def bench(fx, rounds):
+        progress_bar = load_file(path.replace("/", "_")[:-3], path).progress_bar
+        message = fx.client.new_message(1, "status")
+        return measure_async(lambda: progress_bar(37 * 1024 * 1024, 100 * 1024 * 1024, message, *args), rounds)
+    return bench
+
+
+benchmark("progress_bar[helpers/progress.py]")(_progress("helpers/progress.py", ("Downloading",)))
+benchmark("progress_bar[utils/progress.py]")(_progress("utils/progress.py", ("Downloading",)))
+benchmark("progress_bar[plugins/utils.py]")(_progress("plugins/utils.py", ("Downloading",)))
+
+
+@benchmark("format_bytes")
+def bench_format_bytes(fx, rounds):
+    from plugins.link_handeler import format_bytes
+    sizes = [512, 3 * 1024 ** 2 + 17, 5 * 1024 ** 4]
+    return measure(lambda: [format_bytes(s) for s in sizes], rounds)
+
+
+@benchmark("generate_user_image")
+def bench_generate_user_image(fx, rounds):
+    from plugins import start
+    if not os.path.exists(start.FONT_PATH):
+        start.FONT_PATH = SYSTEM_FONT
+    return measure(lambda: start.generate_user_image("Bench", "bench", 42), rounds)
+
+
+@benchmark("generate_screenshots", needs=("ffmpeg", "ffprobe"))
+def bench_generate_screenshots(fx, rounds):
+    from plugins.link_handeler import generate_screenshots
+    clip = fx.clip
+
+    def cleanup():
+        # ffmpeg won't overwrite earlier shots and waits for an answer on stdin
+        for i in range(3):
+            if os.path.exists(f"/tmp/ss_{i}.jpg"):
+                os.remove(f"/tmp/ss_{i}.jpg")
+
+    def call():
+        cleanup()
+        return generate_screenshots(clip, 3)
+    try:
+        return measure(call, rounds, min_time=0)
+    finally:
+        cleanup()
+
+
+@benchmark("download_with_progress")
+def bench_download_with_progress(fx, rounds):
+    from helpers import download_with_progress
+    url = fx.payload_url
+    target = os.path.join(fx.tmp, "download.bin")
+    message = fx.client.new_message(1, "status")
+    return measure_async(lambda: download_with_progress(url, target, message), rounds, min_time=0)
+
+
+@benchmark("broadcast_messages")
+def bench_broadcast_messages(fx, rounds):
+    from TechVJ.broadcast import broadcast_messages
+    message = fx.client.new_message(1, "Broadcast")
+    return measure_async(lambda: broadcast_messages(42, message), rounds)
+
+
+def summarize(times):
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "rounds": len(times)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def fmt(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def run(args):
+    install_fake_mongo()
+    fx = Fixtures()
+    results = {}
+    try:
+        for name, (func, needs) in BENCHMARKS.items():
+            if args.filter and args.filter not in name:
+                continue
+            missing = [tool for tool in needs if not shutil.which(tool)]
+            if missing:
+                print(f"{name:<40} skipped (missing {', '.join(missing)})")
+                continue
+            results[name] = summarize(func(fx, args.rounds))
+            print(f"{name:<40} median {fmt(results[name]['median']):>10}  min {fmt(results[name]['min']):>10}")
+    finally:
+        fx.close()
+    return {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "benchmarks": results
+    }
+
+
+def compare(current, baseline, threshold):
+    regressions = []
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} (threshold {threshold:.0%})")
+    for name, now in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if not before:
+            continue
+        ratio = now["median"] / before["median"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(f"{name:<40} {fmt(before['median']):>10} -> {fmt(now['median']):>10}  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the bot's hot paths")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file from an earlier --save")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before failing")
+    args = parser.parse_args(argv)
+
+    current = run(args)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(current, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,21 @@
+import csv
 from pymongo import MongoClient
 from config import MONGO_DB_URI
 
 client = MongoClient(MONGO_DB_URI)
 db = client["universal_video_bot"]
 users = db["users"]
+# One small document per counter, kept up to date on every write
+stats = db["stats"]
 
 def save_user(user_id, name, username):
-    users.update_one(
+    result = users.update_one(
         {"_id": user_id},
         {"$set": {"name": name, "username": username}},
         upsert=True
     )
+    if result.upserted_id is not None:
+        stats.update_one({"_id": "users"}, {"$inc": {"count": 1}})
 
 def has_been_notified(user_id):
     user = users.find_one({"_id": user_id})
@@ -23,6 +28,8 @@ def set_notified(user_id):
 
 def delete_user(user_id):
     result = users.delete_one({"_id": user_id})
+    if result.deleted_count:
+        stats.update_one({"_id": "users"}, {"$inc": {"count": -1}})
     return result.deleted_count > 0
 
 
@@ -53,12 +60,20 @@ from motor.motor_asyncio import AsyncIOMotorClient
 client = AsyncIOMotorClient(MONGO_DB_URI)
 db = client["downloader-bot"]
 premium_col = db["premium_users"]
+users_col = client["universal_video_bot"]["users"]
+stats_col = client["universal_video_bot"]["stats"]
 
 async def add_premium(user_id: int):
-    await premium_col.update_one({"_id": user_id}, {"$set": {"_id": user_id}}, upsert=True)
+    result = await premium_col.update_one({"_id": user_id}, {"$set": {"_id": user_id}}, upsert=True)
+    if result.upserted_id is not None:
+        await stats_col.update_one({"_id": "premium"}, {"$inc": {"count": 1}})
+    return result.upserted_id is not None
 
 async def remove_premium(user_id: int):
-    await premium_col.delete_one({"_id": user_id})
+    result = await premium_col.delete_one({"_id": user_id})
+    if result.deleted_count:
+        await stats_col.update_one({"_id": "premium"}, {"$inc": {"count": -1}})
+    return result.deleted_count > 0
 
 async def is_premium(user_id: int) -> bool:
     return await premium_col.find_one({"_id": user_id}) is not None
@@ -67,4 +82,41 @@ async def list_premium() -> list:
     return [doc["_id"] async for doc in premium_col.find()]
 
 async def get_all_premium() -> list:
-    return await premium_col.distinct("_id")
\ No newline at end of file
+    return await premium_col.distinct("_id")
+
+async def record_download(size: int):
+    try:
+        await stats_col.update_one({"_id": "downloads"}, {"$inc": {"count": 1, "bytes": size}}, upsert=True)
+    except Exception as e:
+        print(f"Failed to record download: {e}")
+
+async def get_stats() -> dict:
+    """All counters from one read of the stats collection.
+
+    The user and premium counters are counted once from their collections
+    the first time they're missing, after that only writes move them.
+    """
+    counters = {doc["_id"]: doc async for doc in stats_col.find({})}
+    for name, col in (("users", users_col), ("premium", premium_col)):
+        if name not in counters:
+            count = await col.count_documents({})
+            await stats_col.update_one({"_id": name}, {"$setOnInsert": {"count": count}}, upsert=True)
+            counters[name] = {"count": count}
+    downloads = counters.get("downloads", {})
+    return dict(
+        users=counters["users"]["count"],
+        premium=counters["premium"]["count"],
+        downloads=downloads.get("count", 0),
+        bytes_served=downloads.get("bytes", 0)
+    )
+
+async def export_csv(col, fields, path):
+    """Stream a collection into a CSV file without holding it in memory."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        rows = 0
+        async for doc in col.find({}, {k: 1 for k in fields}).batch_size(1000):
+            writer.writerow([doc.get(k, "") for k in fields])
+            rows += 1
+    return rows
@@ -0,0 +1,54 @@
+import inspect
+from pathlib import Path
+from importlib import import_module
+from pyrogram import StopPropagation, ContinuePropagation
+from pyrogram.handlers import MessageHandler, CallbackQueryHandler
+from pyrogram.handlers.handler import Handler
+from loadtest.fakes import FakeCallbackQuery
+
+
+class PluginDispatcher:
+    """Registers handlers the way Client.load_plugins does and runs updates like the Dispatcher.
+
+    Scenarios that feed updates through it only reach handlers the real bot
+    would load from the plugins root, in the same group order, filters
+    included. Unlike Pyrogram, handler errors are raised so the load test
+    can count them.
+    """
+
+    def __init__(self, root="plugins", skip=()):
+        self.groups = {}
+        for path in sorted(Path(root.replace(".", "/")).rglob("*.py")):
+            if path.stem in skip:
+                continue
+            module = import_module(".".join(path.parent.parts + (path.stem,)))
+            for name in vars(module).keys():
+                for handler, group in getattr(getattr(module, name), "handlers", []):
+                    if isinstance(handler, Handler) and isinstance(group, int):
+                        self.groups.setdefault(group, []).append(handler)
+        self.groups = dict(sorted(self.groups.items()))
+
+    @property
+    def callbacks(self):
+        return {h.callback.__name__ for group in self.groups.values() for h in group}
+
+    async def feed(self, client, update):
+        """Run `update` through the registered handlers, returning the names of those that ran."""
+        handler_type = CallbackQueryHandler if isinstance(update, FakeCallbackQuery) else MessageHandler
+        ran = []
+        try:
+            for group in self.groups.values():
+                for handler in group:
+                    if not isinstance(handler, handler_type) or not await handler.check(client, update):
+                        continue
+                    ran.append(handler.callback.__name__)
+                    try:
+                        result = handler.callback(client, update)
+                        if inspect.isawaitable(result):
+                            await result
+                    except ContinuePropagation:
+                        continue
+                    break
+        except StopPropagation:
+            pass
+        return ran
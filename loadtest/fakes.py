@@ -0,0 +1,327 @@
+import time
+import random
+import asyncio
+import itertools
+import contextvars
+from collections import Counter
+from io import BytesIO
+from datetime import datetime
+from types import SimpleNamespace
+from pyrogram import StopPropagation
+from pyrogram.enums import ChatType
+from pyrogram.types import Message, CallbackQuery
+
+# API calls made while handling the current user action
+current_action = contextvars.ContextVar("current_action", default=None)
+
+_ids = itertools.count(1000)
+
+
+class FakeUser:
+
+    def __init__(self, id, first_name="Load", username=None):
+        self.id = id
+        self.first_name = first_name
+        self.username = username
+        self.is_self = False
+        self.mention = f"[{first_name}](tg://user?id={id})"
+
+
+class FakeChat:
+
+    def __init__(self, id):
+        self.id = id
+        self.type = ChatType.PRIVATE if id > 0 else ChatType.SUPERGROUP
+
+
+class FakeMessage(Message):
+    # A Message subclass so Pyrogram's own filters accept it
+
+    def __init__(self, client, chat_id, from_user=None, text=None, reply_to_message=None):
+        self._client = client
+        self.id = next(_ids)
+        self.chat = FakeChat(chat_id)
+        self.from_user = from_user
+        self.text = text
+        self.caption = None
+        self.reply_to_message = reply_to_message
+        self.reply_to_message_id = reply_to_message.id if reply_to_message else None
+        self.forward_date = None
+        self.document = None
+        self.date = datetime.now()
+        self.command = text[1:].split() if text and text.startswith("/") else None
+        self.photo = SimpleNamespace(file_id=f"photo_{self.id}")
+        self.video = SimpleNamespace(file_id=f"video_{self.id}")
+
+    @property
+    def link(self):
+        return f"https://t.me/c/{abs(self.chat.id)}/{self.id}"
+
+    async def _api(self, name, chat_id=None):
+        return await self._client._api(name, self.chat.id if chat_id is None else chat_id)
+
+    async def reply(self, *args, **kwargs):
+        return await self._api("send_message")
+
+    reply_text = reply
+
+    async def reply_photo(self, *args, **kwargs):
+        return await self._api("send_photo")
+
+    async def reply_video(self, *args, **kwargs):
+        return await self._api("send_video")
+
+    async def reply_document(self, *args, **kwargs):
+        return await self._api("send_document")
+
+    async def edit(self, *args, **kwargs):
+        return await self._api("edit_message_text")
+
+    edit_text = edit
+
+    async def delete(self, *args, **kwargs):
+        await self._api("delete_messages")
+        return True
+
+    async def copy(self, chat_id, *args, **kwargs):
+        return await self._api("copy_message", chat_id)
+
+    def stop_propagation(self):
+        raise StopPropagation
+
+
+class FakeCallbackQuery(CallbackQuery):
+
+    def __init__(self, message, data, match=None):
+        self.message = message
+        self.data = data
+        self.matches = [match]
+        self.from_user = message.reply_to_message.from_user if message.reply_to_message else None
+
+    async def answer(self, *args, **kwargs):
+        return await self.message._api("answer_callback_query")
+
+    def stop_propagation(self):
+        raise StopPropagation
+
+
+class FakeClient:
+    """Stands in for a Pyrogram client and records every API call.
+
+    Each call waits `latency` seconds. With probability `flood_rate` it hits a
+    FloodWait of `flood_seconds`. Like Pyrogram, waits up to `sleep_threshold`
+    are slept through inside the call and longer ones are raised.
+    """
+
+    def __init__(self, latency=0.05, flood_rate=0.0, flood_seconds=1, sleep_threshold=10, answers=None):
+        self.latency = latency
+        self.flood_rate = flood_rate
+        self.flood_seconds = flood_seconds
+        self.sleep_threshold = sleep_threshold
+        self.answers = answers or []
+        self.calls = Counter()
+        self.flood_waits = 0
+        self._asked = Counter()
+        self.me = FakeUser(1, "LoadTest", "LoadTestBot")
+
+    async def _api(self, name, chat_id=None):
+        self.calls[name] += 1
+        action = current_action.get()
+        if action is not None:
+            action[name] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.flood_rate and random.random() < self.flood_rate:
+            self.flood_waits += 1
+            if self.flood_seconds > self.sleep_threshold:
+                from pyrogram.errors import FloodWait
+                raise FloodWait(value=self.flood_seconds)
+            await asyncio.sleep(self.flood_seconds)
+        return FakeMessage(self, chat_id or 0)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        async def method(chat_id=None, *args, **kwargs):
+            return await self._api(name, chat_id)
+        return method
+
+    async def get_profile_photos(self, chat_id, limit=None):
+        await self._api("get_profile_photos", chat_id)
+        return SimpleNamespace(total_count=0, photos=[])
+
+    async def download_media(self, message=None, *args, in_memory=False, **kwargs):
+        await self._api("download_media")
+        document = getattr(message, "document", None)
+        if in_memory and document is not None:
+            return BytesIO(document.content)
+        return None
+
+    def new_document(self, user_id, content, caption=None):
+        message = FakeMessage(self, user_id, FakeUser(user_id))
+        message.caption = caption
+        message.document = SimpleNamespace(file_id=f"document_{message.id}", file_size=len(content), content=content)
+        return message
+
+    async def send_media_group(self, chat_id, media, *args, **kwargs):
+        await self._api("send_media_group", chat_id)
+        return [FakeMessage(self, chat_id) for _ in media]
+
+    async def copy_message(self, chat_id, from_chat_id=None, message_id=None, *args, **kwargs):
+        return await self._api("copy_message", chat_id)
+
+    async def ask(self, chat_id, text, *args, **kwargs):
+        await self._api("send_message", chat_id)
+        # Every chat walks through the same scripted answers
+        step = self._asked[chat_id]
+        self._asked[chat_id] += 1
+        answer = self.answers[step] if step < len(self.answers) else "/cancel"
+        return FakeMessage(self, chat_id, FakeUser(chat_id), answer)
+
+    def new_message(self, user_id, text, reply_to_message=None):
+        return FakeMessage(self, user_id, FakeUser(user_id), text, reply_to_message)
+
+
+def _matches(doc, query):
+    return all(doc.get(k) == v for k, v in query.items())
+
+
+def _apply(doc, update, inserted):
+    for k, v in update.get("$set", {}).items():
+        doc[k] = v
+    for k, v in update.get("$inc", {}).items():
+        doc[k] = doc.get(k, 0) + v
+    if inserted:
+        for k, v in update.get("$setOnInsert", {}).items():
+            doc[k] = v
+
+
+class FakeCollection:
+    """In-memory stand-in for a pymongo collection, blocking like the real one."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.docs = []
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _find(self, query):
+        return [d for d in self.docs if _matches(d, query or {})]
+
+    def insert_one(self, doc):
+        self._wait()
+        self.docs.append(dict(doc))
+        return SimpleNamespace(inserted_id=doc.get("_id"))
+
+    def find_one(self, query=None, *args, **kwargs):
+        self._wait()
+        found = self._find(query)
+        return dict(found[0]) if found else None
+
+    def find(self, query=None, *args, **kwargs):
+        self._wait()
+        return [dict(d) for d in self._find(query)]
+
+    def update_one(self, query, update, upsert=False):
+        self._wait()
+        found = self._find(query)
+        if found:
+            _apply(found[0], update, False)
+            return SimpleNamespace(matched_count=1, upserted_id=None)
+        if upsert:
+            doc = dict(query)
+            _apply(doc, update, True)
+            self.docs.append(doc)
+            return SimpleNamespace(matched_count=0, upserted_id=doc.get("_id"))
+        return SimpleNamespace(matched_count=0, upserted_id=None)
+
+    def delete_one(self, query):
+        self._wait()
+        found = self._find(query)
+        if found:
+            self.docs.remove(found[0])
+        return SimpleNamespace(deleted_count=len(found[:1]))
+
+    def delete_many(self, query):
+        self._wait()
+        found = self._find(query)
+        for d in found:
+            self.docs.remove(d)
+        return SimpleNamespace(deleted_count=len(found))
+
+    def count_documents(self, query):
+        self._wait()
+        return len(self._find(query))
+
+    def distinct(self, key, query=None):
+        self._wait()
+        return list({d[key] for d in self._find(query) if key in d})
+
+
+class FakeCursor:
+
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def batch_size(self, size):
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeAsyncCollection:
+    """Motor flavoured wrapper around FakeCollection that yields instead of blocking."""
+
+    def __init__(self, latency=0.0, collection=None):
+        self.latency = latency
+        # Passing the sync collection gives a motor handle on the same documents
+        self._sync = collection or FakeCollection()
+
+    @property
+    def docs(self):
+        return self._sync.docs
+
+    def find(self, query=None, *args, **kwargs):
+        return FakeCursor(self._sync.find(query))
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        method = getattr(self._sync, name)
+
+        async def wrapper(*args, **kwargs):
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return method(*args, **kwargs)
+        return wrapper
+
+
+def install_fake_mongo(latency=0.0):
+    """Point every database module at in-memory collections.
+
+    Must run before the handler modules are imported, otherwise they open
+    real connections to the configured cluster.
+    """
+    import config
+    config.MONGO_URI = config.MONGO_DB_URI = "mongodb://127.0.0.1:27017"
+
+    import db
+    import TechVJ.db
+    db.users = FakeCollection(latency)
+    db.stats = FakeCollection(latency)
+    db.users_col = FakeAsyncCollection(latency, db.users)
+    db.stats_col = FakeAsyncCollection(latency, db.stats)
+    db.premium_col = FakeAsyncCollection(latency)
+    TechVJ.db.db.col = FakeAsyncCollection(latency)
+    TechVJ.db.db.stats = FakeAsyncCollection(latency)
+    return db, TechVJ.db.db
@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import threading
+import subprocess
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+# Served under a path containing a supported domain so is_video_link() accepts the URL
+MEDIA_PATH = "youtube.com/clip.mp4"
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+def make_clip(path, seconds=10, size="640x360"):
+    """Render a small test clip with ffmpeg's test sources."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    subprocess.run([
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"testsrc=duration={seconds}:size={size}:rate=25",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-g", "50", "-c:a", "aac", "-shortest", path
+    ], check=True)
+    return path
+
+
+class MediaServer:
+    """Local HTTP server standing in for the video sites."""
+
+    def __init__(self, seconds=10):
+        self.seconds = seconds
+        self.root = None
+        self.httpd = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/{MEDIA_PATH}"
+
+    @property
+    def clip(self):
+        return os.path.join(self.root, MEDIA_PATH)
+
+    def start(self):
+        if not shutil.which("ffmpeg"):
+            raise RuntimeError("ffmpeg is needed to build the test media")
+        self.root = tempfile.mkdtemp(prefix="loadtest_media_")
+        make_clip(self.clip, self.seconds)
+        handler = partial(QuietHandler, directory=self.root)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+        if self.root:
+            shutil.rmtree(self.root, ignore_errors=True)
@@ -0,0 +1,256 @@
+"""Drive the real handlers against fake Telegram, Mongo and media backends.
+
+    python -m loadtest.run --scenario start --actions 500 --concurrency 50
+    python -m loadtest.run --scenario all --latency 0.05 --flood-rate 0.01
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+from collections import Counter
+from pyrogram import StopPropagation
+from loadtest.fakes import FakeClient, FakeCallbackQuery, current_action, install_fake_mongo
+from loadtest.media_server import MediaServer
+from loadtest.dispatch import PluginDispatcher
+
+SCENARIOS = ["start", "generate", "broadcast", "link", "audio", "leech", "abuse", "convert"]
+SYSTEM_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+
+class Result:
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.calls = Counter()
+        self.errors = Counter()
+        self.wall = 0.0
+        self.extra = {}
+
+    def show(self):
+        actions = len(self.latencies)
+        api_calls = sum(self.calls.values())
+        print(f"\n== {self.name}")
+        print(f"actions: {actions}  errors: {sum(self.errors.values())}  wall: {self.wall:.2f}s")
+        print(f"messages/s: {actions / self.wall if self.wall else 0:.1f}")
+        print(f"latency p50: {percentile(self.latencies, 50) * 1000:.1f} ms  p99: {percentile(self.latencies, 99) * 1000:.1f} ms")
+        print(f"api calls/action: {api_calls / actions if actions else 0:.2f}  ({', '.join(f'{k}={v}' for k, v in self.calls.most_common())})")
+        for k, v in self.extra.items():
+            print(f"{k}: {v}")
+        for err, n in self.errors.most_common(3):
+            print(f"  {n}x {err}")
+
+
+async def run_actions(result, make_action, total, concurrency):
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+
+    async def worker():
+        while not queue.empty():
+            i = queue.get_nowait()
+            calls = Counter()
+            current_action.set(calls)
+            start = time.perf_counter()
+            try:
+                await make_action(i)
+            except Exception as e:
+                result.errors[f"{type(e).__name__}: {e}"] += 1
+            result.latencies.append(time.perf_counter() - start)
+            result.calls.update(calls)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.wall = time.perf_counter() - start
+    return result
+
+
+def client_for(args, answers=None):
+    return FakeClient(args.latency, args.flood_rate, args.flood_seconds, answers=answers)
+
+
+async def scenario_start(args, dbs):
+    from plugins import start
+    if not os.path.exists(start.FONT_PATH) and os.path.exists(args.font):
+        start.FONT_PATH = args.font
+    client = client_for(args)
+
+    async def action(i):
+        await start.start_handler(client, client.new_message(100000 + i, "/start"))
+    return await run_actions(Result("start"), action, args.actions, args.concurrency)
+
+
+async def scenario_generate(args, dbs):
+    from TechVJ import generate
+    # Skip the API id prompt, then cancel at the phone number before any real login
+    client = client_for(args, answers=["/skip", "/cancel"])
+
+    async def action(i):
+        msg = client.new_message(200000 + i, "/generate")
+        await generate.main(client, msg)
+        await generate.generate_session(client, msg)
+    return await run_actions(Result("generate"), action, args.actions, args.concurrency)
+
+
+async def scenario_broadcast(args, dbs):
+    from config import OWNER_ID
+    from TechVJ.token_pool import pool, Worker
+    dispatcher = PluginDispatcher(skip=("admission",))
+    _, techvj_db = dbs
+    techvj_db.col.docs[:] = [{"id": 300000 + i, "name": "Load"} for i in range(args.broadcast_users)]
+    client = client_for(args)
+    pool.main = Worker(client, "main", is_main=True)
+    pool.helpers = [Worker(client_for(args), f"helper_{i}") for i in range(args.helpers)]
+
+    async def action(i):
+        b_msg = client.new_message(OWNER_ID, "Broadcast")
+        ran = await dispatcher.feed(client, client.new_message(OWNER_ID, "/broadcast", reply_to_message=b_msg))
+        if ran != ["verupikkals"]:
+            raise RuntimeError(f"/broadcast reached {ran or 'no handler'}")
+    result = await run_actions(Result("broadcast"), action, 1, 1)
+    delivered = sum(w.sent for w in pool.workers)
+    result.extra["deliveries/s"] = f"{delivered / result.wall:.1f} ({', '.join(f'{w.name}={w.sent}' for w in pool.workers)})"
+    return result
+
+
+async def _link(args, server, mode):
+    # Through the registered plugins, the way the bot receives them
+    dispatcher = PluginDispatcher(skip=("admission",))
+    client = client_for(args)
+
+    async def action(i):
+        # The link gets a Video / Audio prompt, then the user taps a button
+        link_msg = client.new_message(400000 + i, server.url)
+        ran = await dispatcher.feed(client, link_msg)
+        prompt = client.new_message(400000 + i, "What do you want to download?", reply_to_message=link_msg)
+        ran += await dispatcher.feed(client, FakeCallbackQuery(prompt, f"dl:{mode}"))
+        if ran != ["auto_video_downloader", "download_mode_callback"]:
+            raise RuntimeError(f"Link and button reached {ran or 'no handler'}")
+    return await run_actions(Result(mode if mode == "audio" else "link"), action, args.actions, args.concurrency)
+
+
+async def scenario_link(args, dbs, server):
+    return await _link(args, server, "video")
+
+
+async def scenario_audio(args, dbs, server):
+    return await _link(args, server, "audio")
+
+
+async def scenario_leech(args, dbs, server):
+    from plugins import link_handeler
+    client = client_for(args)
+
+    async def action(i):
+        await link_handeler.leech_handler(client, client.new_message(500000 + i, f"/leech {server.url} -ss 3"))
+    return await run_actions(Result("leech"), action, args.actions, args.concurrency)
+
+
+async def scenario_abuse(args, dbs, server):
+    """One user floods /leech while everyone else just uses /start."""
+    from plugins import start
+    if not os.path.exists(start.FONT_PATH) and os.path.exists(args.font):
+        start.FONT_PATH = args.font
+    dispatcher = PluginDispatcher(skip=("admission",) if args.no_admission else ())
+    client = client_for(args)
+    rejected = Counter()
+
+    async def dispatch(message):
+        # Stopped in group -1 when the rate limiter is the only handler that ran
+        if await dispatcher.feed(client, message) == ["admit_message"]:
+            rejected[message.from_user.id] += 1
+
+    abuser = asyncio.gather(*(
+        dispatch(client.new_message(600000, f"/leech {server.url} -ss 3"))
+        for _ in range(args.abuse_requests)
+    ))
+
+    async def action(i):
+        await dispatch(client.new_message(700000 + i, "/start"))
+    result = await run_actions(Result("abuse (latency of the other users)"), action, args.actions, args.concurrency)
+    await abuser
+    result.extra["abusive leeches admitted"] = f"{args.abuse_requests - rejected[600000]} / {args.abuse_requests}"
+    result.extra["other users rejected"] = sum(n for user, n in rejected.items() if user != 600000)
+    return result
+
+
+async def scenario_convert(args, dbs):
+    """Bulk /convert batches with broken lines, as text and as captioned files, fed through the loaded plugins."""
+    import base64
+    import struct
+    from TechVJ.convert import PYROGRAM_FORMAT, PYROGRAM_OLD_FORMAT
+    # Rate limits aren't what's measured here
+    dispatcher = PluginDispatcher(skip=("admission",))
+    client = client_for(args)
+
+    def pack(fmt, *fields):
+        return base64.urlsafe_b64encode(struct.pack(fmt, *fields)).decode().rstrip("=")
+
+    lines = [
+        pack(PYROGRAM_FORMAT, 2, 12345, False, os.urandom(256), 777000, False),
+        pack(PYROGRAM_FORMAT, 4, 12345, True, os.urandom(256), 777000, False),
+        pack(PYROGRAM_OLD_FORMAT, 9, False, os.urandom(256), 777000, False),
+        base64.urlsafe_b64encode(os.urandom(263)).decode()[:351],
+        "not a session"
+    ]
+
+    async def action(i):
+        batch = "\n".join(lines[:1 + i % len(lines)] * (1 + i % 3))
+        if i % 2:
+            # A .txt file with /convert as its caption
+            message = client.new_document(800000 + i, batch.encode(), caption="/convert")
+        else:
+            message = client.new_message(800000 + i, "/convert " + batch)
+        ran = await dispatcher.feed(client, message)
+        if "convert_cmd" not in ran:
+            raise RuntimeError(f"/convert reached {ran or 'no handler'}")
+    return await run_actions(Result("convert"), action, args.actions, args.concurrency)
+
+
+async def main(args):
+    dbs = install_fake_mongo(args.mongo_latency)
+    names = SCENARIOS if args.scenario == "all" else [args.scenario]
+    server = None
+    if {"link", "audio", "leech", "abuse"} & set(names):
+        server = MediaServer(args.clip_seconds).start()
+    try:
+        for name in names:
+            runner = globals()[f"scenario_{name}"]
+            if name in ("link", "audio", "leech", "abuse"):
+                result = await runner(args, dbs, server)
+            else:
+                result = await runner(args, dbs)
+            result.show()
+    finally:
+        if server:
+            server.stop()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test for the bot handlers")
+    parser.add_argument("--scenario", choices=SCENARIOS + ["all"], default="all")
+    parser.add_argument("--actions", type=int, default=200, help="user actions per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per Telegram API call")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="chance of a FloodWait per API call")
+    parser.add_argument("--flood-seconds", type=int, default=1)
+    parser.add_argument("--mongo-latency", type=float, default=0.002, help="seconds per database call")
+    parser.add_argument("--broadcast-users", type=int, default=1000)
+    parser.add_argument("--helpers", type=int, default=0, help="fake helper bot tokens for the broadcast")
+    parser.add_argument("--clip-seconds", type=int, default=10)
+    parser.add_argument("--abuse-requests", type=int, default=50, help="/leech requests fired at once by one user in the abuse scenario")
+    parser.add_argument("--no-admission", action="store_true", help="run the abuse scenario without the rate limiter, for comparison")
+    parser.add_argument("--font", default=SYSTEM_FONT, help="used when the bot's own font file is missing")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -1,4 +1,14 @@
+from config import USE_UVLOOP
+from TechVJ.watchdog import watchdog, install_uvloop
+
+# The loop policy has to be set before the client creates its event loop
+if USE_UVLOOP:
+    install_uvloop()
+
 from pyrogram import Client
+from TechVJ.token_pool import pool
+from TechVJ.admission import admission
+from db import get_all_premium
 from config import API_ID, API_HASH, BOT_TOKEN, LOG_CHANNEL  # LOG_CHANNEL হলো তোমার লক চ্যানেলের ID বা ইউজারনেম
 
 class Bot(Client):
@@ -17,6 +27,12 @@ class Bot(Client):
         await super().start()
         me = await self.get_me()
         print(f"Bot Started as @{me.username}")
+        await pool.start(self)
+        watchdog.start()
+        try:
+            admission.load_premium(await get_all_premium())
+        except Exception as e:
+            print(f"Failed to load premium users: {e}")
 
         # বট স্টার্ট নোটিফিকেশন
         try:
@@ -31,7 +47,9 @@ class Bot(Client):
             await self.send_message(LOG_CHANNEL, f"❌ Bot Stopped @{me.username}")
         except Exception as e:
             print(f"Failed to send stop notification: {e}")
-        
+
+        watchdog.stop()
+        await pool.stop()
         await super().stop()
         print("Bot Stopped.")
 
@@ -0,0 +1,40 @@
+from pyrogram import Client, filters
+from pyrogram.types import Message, CallbackQuery
+from config import ADMIN_ID
+from TechVJ.admission import admission, classify_message, classify_callback, COMMANDS
+
+# Group -1 runs before every other handler, a rejected update stops here
+# before any database or Telegram call is made for it.
+
+
+@Client.on_message(filters.private | filters.command(COMMANDS), group=-1)
+async def admit_message(client, message: Message):
+    if not message.from_user:
+        return
+    wait = admission.admit(message.from_user.id, classify_message(message))
+    if not wait:
+        return
+    if admission.should_notify(message.from_user.id, wait):
+        try:
+            await message.reply(f"⏳ You're going too fast, try again in {int(wait) + 1}s.", quote=True)
+        except Exception as e:
+            print(f"Rate limit notice failed: {e}")
+    message.stop_propagation()
+
+
+@Client.on_callback_query(group=-1)
+async def admit_callback(client, callback_query: CallbackQuery):
+    wait = admission.admit(callback_query.from_user.id, classify_callback(callback_query))
+    if not wait:
+        return
+    if admission.should_notify(callback_query.from_user.id, wait):
+        try:
+            await callback_query.answer(f"⏳ Too many requests, try again in {int(wait) + 1}s.", show_alert=True)
+        except Exception as e:
+            print(f"Rate limit notice failed: {e}")
+    callback_query.stop_propagation()
+
+
+@Client.on_message(filters.command("limits") & filters.user(ADMIN_ID))
+async def limits_cmd(client, message: Message):
+    await message.reply(f"**🚦 Admission Control**\n\n{admission.status()}")
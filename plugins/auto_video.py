@@ -0,0 +1,30 @@
+from pyrogram import Client, filters
+from pyrogram.types import Message, CallbackQuery
+from TechVJ.auto_video import is_video_link, mode_buttons, process_link
+
+# Only links, so commands still reach their own handlers in this group
+@Client.on_message(filters.private & filters.text & filters.regex(r"^https?://"))
+async def auto_video_downloader(client, message: Message):
+    url = message.text.strip()
+    if not url.startswith("http") or not is_video_link(url):
+        return
+
+    await message.reply("What do you want to download?", reply_markup=mode_buttons, quote=True)
+
+@Client.on_callback_query(filters.regex(r"^dl:(video|audio)$"))
+async def download_mode_callback(client, callback_query: CallbackQuery):
+    mode = callback_query.matches[0].group(1)
+    link_msg = callback_query.message.reply_to_message
+    if not link_msg or not link_msg.text:
+        return await callback_query.answer("Link not found, please send it again.", show_alert=True)
+    await callback_query.answer()
+    # Editing the prompt drops its buttons, so the link can't be queued twice
+    status = await callback_query.message.edit("⏳ Fetching video info..." if mode == "video" else "⏳ Fetching audio...")
+    await process_link(client, link_msg, link_msg.text.strip(), mode, status)
+
+@Client.on_message(filters.private & filters.command("audio"))
+async def audio_cmd(client, message: Message):
+    if len(message.command) < 2 or not message.command[1].startswith("http"):
+        return await message.reply("Usage: `/audio {url}`", quote=True)
+    status = await message.reply("⏳ Fetching audio...", quote=True)
+    await process_link(client, message, message.command[1], "audio", status)
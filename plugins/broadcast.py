@@ -0,0 +1,80 @@
+import asyncio
+import datetime
+import time
+from pyrogram import Client, filters
+from config import OWNER_ID, LOG_CHANNEL
+from TechVJ.db import db
+from TechVJ.token_pool import pool
+from TechVJ.broadcast import broadcast_messages, broadcast_worker
+
+@Client.on_message(filters.command("broadcast") & filters.user(OWNER_ID) & filters.reply)
+async def verupikkals(bot, message):
+    users = await db.get_all_users()
+    b_msg = message.reply_to_message
+    if not b_msg:
+        return await message.reply_text("**Reply This Command To Your Broadcast Message**")
+    sts = await message.reply_text(
+        text='Broadcasting your messages...'
+    )
+    start_time = time.time()
+    total_users = await db.total_users_count()
+    count = dict(done=0, success=0, blocked=0, deleted=0, failed=0)
+
+    def on_result(pti, sh):
+        if pti:
+            count['success'] += 1
+        elif pti == False:
+            if sh == "Blocked":
+                count['blocked'] += 1
+            elif sh == "Deleted":
+                count['deleted'] += 1
+            elif sh == "Error":
+                count['failed'] += 1
+        count['done'] += 1
+
+    def progress():
+        return f"Total Users {total_users}\nCompleted: {count['done']} / {total_users}\nSuccess: {count['success']}\nBlocked: {count['blocked']}\nDeleted: {count['deleted']}"
+
+    # Helper bots can't see the owner's chat, so they copy from a mirror in LOG_CHANNEL
+    mirror = await b_msg.copy(LOG_CHANNEL) if pool.helpers else None
+    workers = pool.workers
+    queue = asyncio.Queue()
+    # Users a helper can't reach go to the main bot alone, sharing its pacing with its main queue
+    fallback = asyncio.Queue()
+    tasks = [asyncio.create_task(broadcast_worker(w, queue, b_msg, mirror, on_result, fallback)) for w in workers]
+    if pool.main and pool.helpers:
+        tasks.append(asyncio.create_task(broadcast_worker(pool.main, fallback, b_msg, mirror, on_result)))
+    reported = 0
+
+    async for user in users:
+        if 'id' in user:
+            if tasks:
+                queue.put_nowait(int(user['id']))
+            else:
+                on_result(*await broadcast_messages(int(user['id']), b_msg))
+        else:
+            # Handle the case where 'id' key is missing in the user dictionary
+            on_result(False, "Error")
+        while tasks and queue.qsize() >= 100 * len(tasks):
+            await asyncio.sleep(0.1)
+        if count['done'] // 20 > reported:
+            reported = count['done'] // 20
+            await sts.edit(f"Broadcast in progress:\n\n{progress()}")
+
+    async def all_done():
+        await queue.join()
+        # Helpers only add fallback jobs while they still hold main queue jobs
+        await fallback.join()
+
+    finished = asyncio.create_task(all_done())
+    while not finished.done():
+        await asyncio.wait([finished], timeout=10)
+        if count['done'] // 20 > reported:
+            reported = count['done'] // 20
+            await sts.edit(f"Broadcast in progress:\n\n{progress()}")
+    for task in tasks:
+        task.cancel()
+
+    time_taken = datetime.timedelta(seconds=int(time.time()-start_time))
+    sent_by = ", ".join(f"{w.name}: {w.sent}" for w in workers)
+    await sts.edit(f"Broadcast Completed:\nCompleted in {time_taken} seconds.\n\n{progress()}" + (f"\n\nSent By: {sent_by}" if pool.helpers else ""))
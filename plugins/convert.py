@@ -0,0 +1,57 @@
+import struct
+from io import BytesIO
+from pyrogram import Client, filters
+from pyrogram.types import Message
+from TechVJ.convert import convert_line
+
+# Strings per message before the answer is sent as a file
+MAX_INLINE = 5
+# Biggest replied .txt that gets read, a session string is under 400 bytes
+MAX_DOCUMENT_SIZE = 1024 * 1024
+
+usage = (
+    "**Usage:**\n"
+    "`/convert <session string> [user_id] [bot]`\n\n"
+    "» Pyrogram strings are turned into Telethon ones and the other way round, without logging in.\n"
+    "» Telethon strings don't store the account id, add `user_id` (and `bot` for bot sessions) to get a Pyrogram string.\n"
+    "» Send several strings one per line, or send a `.txt` file with `/convert` as caption (or reply to one), to convert them in bulk."
+)
+
+
+@Client.on_message(filters.private & filters.command("convert"))
+async def convert_cmd(client, message: Message):
+    # The command can also be the caption of the .txt file itself
+    lines = (message.text or message.caption).split("\n")
+    lines[0] = " ".join(lines[0].split()[1:])
+    reply = message.reply_to_message
+    source = message if message.document else reply if reply and reply.document else None
+    if source:
+        if (source.document.file_size or 0) > MAX_DOCUMENT_SIZE:
+            return await message.reply(f"❌ The file is too big, send at most {MAX_DOCUMENT_SIZE // 1024} KB of session strings.")
+        data = await client.download_media(source, in_memory=True)
+        lines += bytes(data.getbuffer()).decode(errors="ignore").splitlines()
+    elif reply and reply.text:
+        lines += reply.text.splitlines()
+    lines = [line for line in (line.strip() for line in lines) if line]
+    if not lines:
+        return await message.reply(usage)
+
+    results = []
+    for line in lines:
+        try:
+            info, converted = convert_line(line)
+            results.append((True, info, converted))
+        except (ValueError, KeyError, struct.error) as e:
+            results.append((False, str(e), line.split()[0][:12] + "..."))
+
+    ok = sum(1 for r in results if r[0])
+    if len(results) <= MAX_INLINE:
+        text = "\n\n".join(
+            f"✅ {info}\n`{value}`" if good else f"❌ `{value}` {info}"
+            for good, info, value in results
+        )
+        return await message.reply(f"**Converted {ok} / {len(results)}**\n\n{text}")
+
+    out = BytesIO("\n".join(r[2] if r[0] else f"# {r[1]}: {r[2]}" for r in results).encode())
+    out.name = "converted_sessions.txt"
+    await message.reply_document(out, caption=f"**Converted {ok} / {len(results)}**")
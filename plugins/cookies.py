@@ -0,0 +1,9 @@
+from pyrogram import Client, filters
+from pyrogram.types import Message
+from config import ADMIN_ID
+from TechVJ.cookies import cookie_pool
+
+
+@Client.on_message(filters.command("cookies") & filters.user(ADMIN_ID))
+async def cookies_cmd(client, message: Message):
+    await message.reply(f"**🍪 Cookie Pool**\n\n{cookie_pool.status()}")
@@ -0,0 +1,19 @@
+from pyrogram import Client, filters
+from pyrogram.types import Message
+from config import ADMIN_ID
+from TechVJ.watchdog import watchdog, format_report
+
+
+@Client.on_message(filters.command("lag") & filters.user(ADMIN_ID))
+async def lag_cmd(client, message: Message):
+    top = 10
+    if len(message.command) > 1 and message.command[1].isdigit():
+        top = int(message.command[1])
+    await message.reply(format_report(watchdog.report(top)))
+
+
+@Client.on_message(filters.command("lag_reset") & filters.user(ADMIN_ID))
+async def lag_reset_cmd(client, message: Message):
+    watchdog.stalls.clear()
+    watchdog.lags.clear()
+    await message.reply("✅ Watchdog stats cleared.")
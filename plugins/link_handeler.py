@@ -6,6 +6,9 @@ from datetime import datetime
 from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, InputMediaPhoto
 from config import LOG_CHANNEL, ADMIN_ID
+from TechVJ.delivery import fan_out_media
+from TechVJ.cookies import cookie_pool
+from db import record_download
 
 VIDEO_EXTENSIONS = [".mp4", ".mkv", ".mov", ".avi", ".webm"]
 
@@ -65,7 +68,8 @@ def download_with_yt(url: str, update_msg: Message):
         "progress_hooks": [hook],
     }
 
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+    with cookie_pool.use(url) as jar, yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        cookie_pool.apply(ydl, jar)
         info = ydl.extract_info(url, download=True)
         file_path = ydl.prepare_filename(info)
         return file_path, info
@@ -96,20 +100,16 @@ async def leech_handler(bot: Client, message: Message):
         screenshots = generate_screenshots(filepath, ss_count)
 
         filename = os.path.basename(filepath)
-        filesize = os.path.getsize(filepath)
         user_id = message.from_user.id
+        # Only the screenshots are delivered, not the downloaded file
+        await record_download(sum(os.path.getsize(img) for img in screenshots))
 
-        media_group = [InputMediaPhoto(media=img) for img in screenshots[:10]]
+        media_group = [InputMediaPhoto(media=img) for img in screenshots]
         first_msg = None
         if media_group:
-            log_msg = await bot.send_media_group(chat_id=LOG_CHANNEL, media=media_group)
-            first_msg = log_msg[0] if log_msg else None
-
-            try:
-                for ss in screenshots:
-                    await bot.send_photo(user_id, ss)
-            except:
-                pass
+            # Uploaded once to the log channel, the user's copy reuses the file_ids
+            sent = await fan_out_media(bot, [LOG_CHANNEL, user_id], media_group)
+            first_msg = sent[LOG_CHANNEL][0] if sent[LOG_CHANNEL] else None
 
             log_button = InlineKeyboardMarkup([[
                 InlineKeyboardButton("🖼 View Screenshots", url=first_msg.link if first_msg else "https://t.me")
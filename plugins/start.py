@@ -122,7 +122,8 @@ async def delete_user_command(client, message):
 
 from pyrogram import Client, filters
 from pyrogram.types import Message
-from db import add_premium, remove_premium, get_all_premium
+from db import add_premium, remove_premium, get_stats, export_csv, premium_col
+from TechVJ.admission import admission
 ADMIN_ID = 7862181538  # তোমার টেলিগ্রাম ID এখানে দাও
 
 @Client.on_message(filters.command("add_premium") & filters.user(ADMIN_ID))
@@ -132,9 +133,10 @@ async def add_premium_cmd(client, message: Message):
 
     try:
         user_id = int(message.command[1])
-        add_premium(user_id)
-        users = get_all_premium()
-        await message.reply(f"✅ Added `{user_id}` as Premium.\nTotal Premiums: {len(users)}")
+        await add_premium(user_id)
+        admission.set_premium(user_id, True)
+        stats = await get_stats()
+        await message.reply(f"✅ Added `{user_id}` as Premium.\nTotal Premiums: {stats['premium']}")
     except Exception as e:
         await message.reply(f"Error: {e}")
 
@@ -145,17 +147,21 @@ async def remove_premium_cmd(client, message: Message):
 
     try:
         user_id = int(message.command[1])
-        remove_premium(user_id)
-        users = get_all_premium()
-        await message.reply(f"❌ Removed `{user_id}` from Premium.\nTotal Premiums: {len(users)}")
+        await remove_premium(user_id)
+        admission.set_premium(user_id, False)
+        stats = await get_stats()
+        await message.reply(f"❌ Removed `{user_id}` from Premium.\nTotal Premiums: {stats['premium']}")
     except Exception as e:
         await message.reply(f"Error: {e}")
 
 @Client.on_message(filters.command("premium_list") & filters.user(ADMIN_ID))
 async def premium_list_cmd(client, message: Message):
-    users = get_all_premium()
-    if not users:
-        return await message.reply("No Premium Users Found.")
-    
-    text = "\n".join([f"- `{u}`" for u in users])
-    await message.reply(f"**Total Premium Users: {len(users)}**\n{text}")
\ No newline at end of file
+    path = f"/tmp/premium_users_{message.id}.csv"
+    try:
+        total = await export_csv(premium_col, ["_id"], path)
+        if not total:
+            return await message.reply("No Premium Users Found.")
+        await message.reply_document(path, caption=f"**Total Premium Users: {total}**")
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,33 @@
+import os
+from pyrogram import Client, filters
+from pyrogram.types import Message
+from config import ADMIN_ID
+from db import get_stats, export_csv, users_col
+from plugins.link_handeler import format_bytes
+
+
+@Client.on_message(filters.command("stats") & filters.user(ADMIN_ID))
+async def stats_cmd(client, message: Message):
+    stats = await get_stats()
+    await message.reply(
+        "**📊 Bot Stats**\n\n"
+        f"**Users:** {stats['users']}\n"
+        f"**Premium Users:** {stats['premium']}\n"
+        f"**Downloads:** {stats['downloads']}\n"
+        f"**Data Served:** {format_bytes(stats['bytes_served'])}"
+    )
+
+
+@Client.on_message(filters.command("export_users") & filters.user(ADMIN_ID))
+async def export_users_cmd(client, message: Message):
+    status = await message.reply("⏳ Exporting users...")
+    path = f"/tmp/users_{message.id}.csv"
+    try:
+        total = await export_csv(users_col, ["_id", "name", "username"], path)
+        await message.reply_document(path, caption=f"**Total Users: {total}**")
+        await status.delete()
+    except Exception as e:
+        await status.edit(f"❌ Export failed: `{e}`")
+    finally:
+        if os.path.exists(path):
+            os.remove(path)